@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+
+from image_analysis import (
+    REQUEST_TIMEOUT,
+    analyze_image_bytes,
+    generate_content,
+    image_part,
+    prompt,
+    strip_code_fences,
+)
+
+batch_prompt = """
+            You are given {count} images. Each image is preceded by its label
+            (image_0, image_1, ...). Analyze every image independently using the
+            instructions below, and return ONE JSON object whose keys are the
+            image labels and whose values are the per-image result, like this:
+            {{
+                "image_0": {{ "items": [...], "person_detected": true/false, "analysis_notes": "..." }},
+                "image_1": {{ ... }}
+            }}
+            Include every label exactly once. Do not include any other text.
+
+            Instructions for each image:
+            """
+
+
+class _Pending:
+    def __init__(self, image_bytes, mime_type):
+        self.image_bytes = image_bytes
+        self.mime_type = mime_type
+        self.done = threading.Event()
+        self.result = None
+        self.fallback = False
+
+
+class AnalysisBatcher:
+    """Combines concurrent image analyses into multi-image Gemini requests.
+
+    Requests arriving within window seconds of the first one (up to
+    max_batch images) are sent as a single generateContent call whose
+    prompt asks for a JSON object keyed by image label. The answer is split
+    back to the waiting callers. Each batch is sent from its own thread, so
+    batches run concurrently while the next one is collected.
+
+    Any image whose result is missing or unparsable - or every image, if
+    the batch request fails or takes longer than timeout seconds - is
+    analyzed again with an individual request in the caller's own thread.
+    """
+
+    def __init__(self, api_key, window=0.25, max_batch=8, api_base=None, timeout=None):
+        self.api_key = api_key
+        self.window = window
+        self.max_batch = max_batch
+        self.api_base = api_base
+        if timeout is None:
+            timeout = window + REQUEST_TIMEOUT
+        self.timeout = timeout
+        self._queue = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.batched_images = 0
+        self.fallbacks = 0
+        self.timeouts = 0
+
+    @classmethod
+    def from_env(cls):
+        """Batcher configured from GEMINI_BATCH_* variables, or None if disabled"""
+        window_ms = float(os.getenv("GEMINI_BATCH_WINDOW_MS", "0"))
+        if window_ms <= 0:
+            return None
+        return cls(
+            os.getenv("GOOGLE_API_KEY"),
+            window=window_ms / 1000,
+            max_batch=int(os.getenv("GEMINI_BATCH_MAX_IMAGES", "8")),
+        )
+
+    def analyze(self, image_bytes, mime_type="image/jpeg"):
+        """Analyze one image as part of the next batch; blocks until done"""
+        pending = _Pending(image_bytes, mime_type)
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="gemini-batcher", daemon=True
+                )
+                self._thread.start()
+            self._queue.append(pending)
+            self._cond.notify()
+        if not pending.done.wait(self.timeout):
+            with self._stats_lock:
+                self.timeouts += 1
+            pending.fallback = True
+            pending.done.set()
+
+        if pending.fallback:
+            return analyze_image_bytes(
+                image_bytes, self.api_key, mime_type, self.api_base
+            )
+        return pending.result
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                # Collect until the window closes or the batch is full
+                deadline = time.monotonic() + self.window
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[: self.max_batch]
+                del self._queue[: self.max_batch]
+            threading.Thread(
+                target=self._send, args=(batch,), name="gemini-batch", daemon=True
+            ).start()
+
+    def _send(self, batch):
+        if len(batch) == 1:
+            # Nothing to share; the caller makes a plain request
+            batch[0].fallback = True
+            batch[0].done.set()
+            return
+
+        parts = [{"text": batch_prompt.format(count=len(batch)) + prompt}]
+        for i, pending in enumerate(batch):
+            parts.append({"text": f"image_{i}:"})
+            parts.append(image_part(pending.image_bytes, pending.mime_type))
+
+        try:
+            results = parse_batch_text(
+                generate_content(parts, self.api_key, self.api_base), len(batch)
+            )
+            with self._stats_lock:
+                self.batches += 1
+                self.batched_images += len(batch)
+        except Exception as e:
+            print(f"Batched image analysis failed, falling back: {e}")
+            results = [None] * len(batch)
+
+        for pending, result in zip(batch, results):
+            if pending.done.is_set():
+                # The caller timed out and fell back already
+                continue
+            if result is None:
+                pending.fallback = True
+                with self._stats_lock:
+                    self.fallbacks += 1
+            else:
+                pending.result = result
+            pending.done.set()
+
+    def status(self):
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "batched_images": self.batched_images,
+            "fallbacks": self.fallbacks,
+            "timeouts": self.timeouts,
+        }
+
+
+def parse_batch_text(response_text, count):
+    """Split a keyed multi-image answer into per-image results.
+
+    Returns a list with one result dict per image, or None for images whose
+    result is missing or malformed. Raises ValueError if the answer is not
+    a JSON object at all.
+    """
+    try:
+        answer = json.loads(strip_code_fences(response_text))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unparsable batch response: {e}")
+    if not isinstance(answer, dict):
+        raise ValueError("Batch response is not a JSON object")
+
+    results = []
+    for i in range(count):
+        result = answer.get(f"image_{i}")
+        if not isinstance(result, dict) or not isinstance(result.get("items"), list):
+            result = None
+        results.append(result)
+    return results
@@ -0,0 +1,213 @@
+import os
+import threading
+import time
+
+import cv2
+
+# Lifting rules (posture_rules.lifting_rules) that mean a lift is attempted
+LIFT_RULES = {"straight_leg_lift", "proper_squat", "partial_knee_lift"}
+
+
+def sharpness(frame):
+    """Variance of the Laplacian of a downscaled grayscale copy"""
+    scale = 320 / max(frame.shape[1], 1)
+    if scale < 1:
+        frame = cv2.resize(
+            frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+        )
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def is_lift_event(checks):
+    """True if the lifting check reports a lift attempt or bad lifting posture"""
+    lifting = (checks or {}).get("lifting")
+    if not lifting:
+        return False
+    return lifting.get("rule") in LIFT_RULES or lifting.get("isGood") is False
+
+
+class _StreamState:
+    def __init__(self):
+        self.event_start = None
+        self.last_trigger = None
+        self.best_frame = None
+        self.best_sharpness = -1.0
+        self.last_dispatch = None
+        self.in_progress = False
+        self.result = None
+        self.events = 0
+        self.analyses = 0
+
+
+class AnalysisScheduler:
+    """Runs carried-item analysis from the posture stream itself.
+
+    A lift event starts on the first frame whose lifting check reports a
+    lift attempt or bad posture, and ends once no such frame has been seen
+    for end_after seconds (or after max_event seconds). Events are closed
+    by the next frame of the stream or, if the stream stops, by a
+    background sweep. The sharpest frame of
+    the event is then analyzed on a background thread, at most once per
+    cooldown seconds per stream, and the result is kept for the stream so
+    every viewer reads the same answer.
+    """
+
+    def __init__(self, analyze, cooldown=30.0, end_after=0.5, max_event=3.0):
+        self.analyze = analyze
+        self.cooldown = cooldown
+        self.end_after = end_after
+        self.max_event = max_event
+        self._lock = threading.Lock()
+        self._streams = {}
+        self._sweeper = None
+
+    @classmethod
+    def from_env(cls, analyze):
+        """Scheduler configured from AUTO_ANALYSIS_* variables, or None if disabled
+
+        Enabled when GOOGLE_API_KEY is set, unless AUTO_ANALYSIS=0.
+        """
+        if not os.getenv("GOOGLE_API_KEY") or os.getenv("AUTO_ANALYSIS", "1") == "0":
+            return None
+        return cls(
+            analyze,
+            cooldown=float(os.getenv("AUTO_ANALYSIS_COOLDOWN", "30")),
+            end_after=float(os.getenv("AUTO_ANALYSIS_EVENT_END", "0.5")),
+            max_event=float(os.getenv("AUTO_ANALYSIS_MAX_EVENT", "3.0")),
+        )
+
+    def _cooling_down(self, state, now):
+        return state.in_progress or (
+            state.last_dispatch is not None
+            and now - state.last_dispatch < self.cooldown
+        )
+
+    def observe(self, stream_id, frame, checks):
+        """Feed one processed frame (BGR, unannotated) and its posture checks"""
+        now = time.monotonic()
+        triggered = is_lift_event(checks)
+
+        with self._lock:
+            state = self._streams.setdefault(stream_id, _StreamState())
+            # Only score frames when the event could actually be analyzed
+            score = triggered and not self._cooling_down(state, now)
+
+        frame_sharpness = sharpness(frame) if score else None
+
+        with self._lock:
+            if triggered:
+                if state.event_start is None:
+                    state.event_start = now
+                    state.events += 1
+                state.last_trigger = now
+                if (
+                    frame_sharpness is not None
+                    and frame_sharpness > state.best_sharpness
+                ):
+                    state.best_frame = frame
+                    state.best_sharpness = frame_sharpness
+
+                if self._sweeper is None:
+                    self._sweeper = threading.Thread(
+                        target=self._sweep, name="item-analysis-sweep", daemon=True
+                    )
+                    self._sweeper.start()
+
+            dispatch = self._close_event(state, now)
+
+        if dispatch is not None:
+            self._dispatch(stream_id, state, dispatch)
+
+    def _close_event(self, state, now):
+        """End the stream's event if it expired; returns what to analyze, if any
+
+        Must be called with the lock held.
+        """
+        if state.event_start is None or (
+            now - state.last_trigger < self.end_after
+            and now - state.event_start < self.max_event
+        ):
+            return None
+        dispatch = None
+        if state.best_frame is not None and not self._cooling_down(state, now):
+            dispatch = (state.best_frame, state.best_sharpness)
+            state.in_progress = True
+            state.last_dispatch = now
+        state.event_start = None
+        state.best_frame = None
+        state.best_sharpness = -1.0
+        return dispatch
+
+    def _dispatch(self, stream_id, state, dispatch):
+        threading.Thread(
+            target=self._run,
+            args=(stream_id, state) + dispatch,
+            name=f"item-analysis-{stream_id}",
+            daemon=True,
+        ).start()
+
+    def _sweep(self):
+        """Close events of streams that stopped sending frames"""
+        while True:
+            time.sleep(self.end_after / 2)
+            now = time.monotonic()
+            with self._lock:
+                dispatches = []
+                for stream_id, state in self._streams.items():
+                    dispatch = self._close_event(state, now)
+                    if dispatch is not None:
+                        dispatches.append((stream_id, state, dispatch))
+            for stream_id, state, dispatch in dispatches:
+                self._dispatch(stream_id, state, dispatch)
+
+    def _run(self, stream_id, state, frame, frame_sharpness):
+        try:
+            ret, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+            if not ret:
+                raise RuntimeError("Failed to encode frame")
+            result = dict(self.analyze(buffer.tobytes()))
+        except Exception as e:
+            print(f"Error analyzing items for stream {stream_id}: {e}")
+            result = {
+                "items": [],
+                "person_detected": False,
+                "analysis_notes": f"Error: {str(e)}",
+                "error": str(e),
+            }
+        result["analyzed_at"] = time.time()
+        result["sharpness"] = round(frame_sharpness, 2)
+        with self._lock:
+            state.result = result
+            state.analyses += 1
+            state.in_progress = False
+
+    def latest(self, stream_id):
+        """Most recent analysis result for a stream, or None"""
+        with self._lock:
+            state = self._streams.get(stream_id)
+            if state is None:
+                return None
+            dispatch = self._close_event(state, time.monotonic())
+            result = state.result
+        if dispatch is not None:
+            self._dispatch(stream_id, state, dispatch)
+        return result
+
+    def forget(self, stream_id):
+        with self._lock:
+            self._streams.pop(stream_id, None)
+
+    def status(self):
+        with self._lock:
+            return {
+                "cooldown": self.cooldown,
+                "streams": {
+                    stream_id: {
+                        "events": state.events,
+                        "analyses": state.analyses,
+                        "in_progress": state.in_progress,
+                    }
+                    for stream_id, state in self._streams.items()
+                },
+            }
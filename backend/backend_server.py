@@ -1,33 +1,58 @@
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import cv2
-import mediapipe as mp
 import numpy as np
 import tempfile
 import os
+import re
 import base64
+import json
 import threading
 import time
-from posture_check import check_lifting_posture
-from image_analysis import ImageAnalysis
+from posture_check import landmarks_to_array
+from posture_rules import PostureRuleEngine
+from image_analysis import ImageAnalysis, analyze_image_bytes, analyze_image_stream
+from analysis_batcher import AnalysisBatcher
+from analysis_scheduler import AnalysisScheduler
+from pose_engines import PoseEngine, Readiness
+from load_governor import LoadGovernor
+from motion_gate import MotionGate
+from frame_capture import FrameCapture
+from stream_renditions import RenditionCache, ViewerPacer
+from overlay import OverlayRenderer
+from sampling_profiler import ProfilerBusy, SamplingProfiler, to_collapsed_text
+import posture_format
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Initialize MediaPipe Pose
-mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
+# On-demand sampling profiler (/api/debug-profile). Threads label their
+# current work with profiler.tag(); this costs nothing while not profiling.
+profiler = SamplingProfiler()
 
-# Two pose instances - one for static images, one for video
-pose_static = mp_pose.Pose(
+
+@app.before_request
+def tag_request_for_profiler():
+    profiler.tag(f"handler:{request.endpoint}")
+
+
+@app.teardown_request
+def clear_request_profiler_tag(exc):
+    profiler.clear()
+
+
+# Two pose instances - one for static images, one for video.
+# Both are built lazily on first use (see pose_engines.PoseEngine).
+pose_static = PoseEngine(
+    "static",
     static_image_mode=True,
     model_complexity=2,
     enable_segmentation=False,
     min_detection_confidence=0.5,
 )
 
-pose_video = mp_pose.Pose(
+pose_video = PoseEngine(
+    "video",
     static_image_mode=False,
     model_complexity=0,  # Fastest model for real-time processing
     enable_segmentation=False,
@@ -35,16 +60,204 @@ pose_video = mp_pose.Pose(
     min_tracking_confidence=0.3,  # Lower threshold for faster tracking
 )
 
+# Engines the readiness probe waits for (and warms up), from POSE_ENGINES -
+# e.g. POSE_ENGINES=video for a deployment that never serves static checks
+readiness = Readiness.from_env({"video": pose_video, "static": pose_static})
+
+# Load governor - picks the model tier, inference resolution and JPEG quality
+# for each video stream based on inference latency and queue depth
+load_governor = LoadGovernor.from_env()
+
+# Motion gate - reuses the last landmarks and verdict while a scene is static
+motion_gate = MotionGate.from_env()
+
+# Optional capture of uploaded frames for replay (see replay.py)
+frame_capture = FrameCapture.from_env()
+
+# Shared per-tier JPEG encodes for /api/video-stream viewers
+rendition_cache = RenditionCache()
+
+# Skeleton, debug labels and posture banners drawn on processed frames
+overlay = OverlayRenderer()
+
+# Optional micro-batching of Gemini requests (GEMINI_BATCH_WINDOW_MS > 0)
+analysis_batcher = AnalysisBatcher.from_env()
+
+
+def analyze_carried_items(image_bytes):
+    """Carried-item analysis of one JPEG, batched when batching is enabled"""
+    if analysis_batcher is not None:
+        return analysis_batcher.analyze(image_bytes)
+    return analyze_image_bytes(image_bytes, os.getenv("GOOGLE_API_KEY"))
+
+
+# Server-side item analysis triggered by lift events in the posture stream
+analysis_scheduler = AnalysisScheduler.from_env(analyze_carried_items)
+
+DEFAULT_STREAM = "default"
+# Client-supplied stream ids are used as keys and capture file names
+STREAM_ID_PATTERN = re.compile(r"[A-Za-z0-9_.-]{1,64}")
+
+# Video engines per (stream, tier) and static engines per model complexity.
+# pose_video and pose_static are the default entries, so warm-up covers them.
+video_engines = {(DEFAULT_STREAM, "fast"): pose_video}
+static_engines = {2: pose_static}
+stream_tiers = {}  # Tier of the engine each stream last used
+engines_lock = threading.Lock()
+
+
+def get_video_engine(stream_id, tier):
+    """Return the (lazily built) video pose engine for a stream and tier
+
+    When a stream switches tiers, the engines of its other tiers are closed.
+    """
+    key = (stream_id, tier["name"])
+    engine = video_engines.get(key)
+    if engine is not None and stream_tiers.get(stream_id) == tier["name"]:
+        return engine
+
+    previous = []
+    with engines_lock:
+        stream_tiers[stream_id] = tier["name"]
+        for other in [k for k in video_engines if k[0] == stream_id and k != key]:
+            # The default engine stays registered for readiness reporting
+            if video_engines[other] is not pose_video:
+                previous.append(video_engines.pop(other))
+        engine = video_engines.get(key)
+        if engine is None:
+            engine = PoseEngine(
+                f"video:{stream_id}:{tier['name']}",
+                static_image_mode=False,
+                model_complexity=tier["model_complexity"],
+                enable_segmentation=False,
+                min_detection_confidence=tier["min_detection_confidence"],
+                min_tracking_confidence=tier["min_tracking_confidence"],
+            )
+            video_engines[key] = engine
+    for old_engine in previous:
+        old_engine.close()
+    return engine
+
+
+def get_static_engine(tier):
+    """Return the (lazily built) static pose engine for a tier"""
+    complexity = tier["model_complexity"]
+    engine = static_engines.get(complexity)
+    if engine is None:
+        with engines_lock:
+            engine = static_engines.get(complexity)
+            if engine is None:
+                engine = PoseEngine(
+                    f"static:{complexity}",
+                    static_image_mode=True,
+                    model_complexity=complexity,
+                    enable_segmentation=False,
+                    min_detection_confidence=0.5,
+                )
+                static_engines[complexity] = engine
+    return engine
+
+
+def release_stale_streams():
+    """Close the pose engines of streams that stopped sending frames"""
+    release_streams(load_governor.prune())
+
+
+def release_streams(stream_ids):
+    """Drop all per-stream state and close the pose engines of the streams"""
+    for stream_id in stream_ids:
+        motion_gate.forget(stream_id)
+        if analysis_scheduler is not None:
+            analysis_scheduler.forget(stream_id)
+        frame_capture.close(stream_id)
+        with engines_lock:
+            stream_tiers.pop(stream_id, None)
+            keys = [key for key in video_engines if key[0] == stream_id]
+            engines = [video_engines[key] for key in keys]
+            for key, engine in zip(keys, engines):
+                # The default engine stays registered for readiness reporting
+                if engine is not pose_video:
+                    del video_engines[key]
+        for engine in engines:
+            engine.close()
+
+
+def resize_for_inference(frame, width):
+    """Downscale a frame to the tier's inference width (landmarks are normalized)"""
+    if not width or frame.shape[1] <= width:
+        return frame
+    height = int(round(frame.shape[0] * width / frame.shape[1]))
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+# Optionally load the models and run one dummy inference per tracked engine
+# in the background, so the first real request does not pay the cold start
+if os.getenv("POSE_WARMUP", "0") == "1":
+    readiness.start_warm_up()
+
 # Global variables for video streaming
 current_frame = None
+current_stream = DEFAULT_STREAM  # Stream that produced current_frame
+frame_version = 0  # Incremented whenever current_frame is replaced
 frame_lock = threading.Lock()
 latest_posture_data = {"isGood": True, "angle": 180, "message": "No pose detected"}
+latest_landmarks = None  # (33, 4) float32 array for latest_posture_data
+posture_seq = 0  # Incremented on every posture update
+posture_lock = threading.Lock()
 debug_mode = True  # Enable debug mode by default
 frame_skip_counter = 0  # For optimizing processing
 # Add a default black frame for when no frame is available
 default_frame = None
 
 
+# Posture rule engine - lifting, back rounding, trunk twist and overhead reach
+# checks evaluated together on one feature table per frame
+rule_engine = PostureRuleEngine()
+
+
+def evaluate_posture(landmarks):
+    """Run every posture check on a (33, 4) landmark array.
+
+    Returns:
+        tuple: (is_good, knee_angle, message, checks) where the first three
+               are the lifting verdict as returned by check_lifting_posture
+               and checks maps every check name to its result
+    """
+    try:
+        result = rule_engine.evaluate_frame(landmarks)
+    except Exception as e:
+        return None, None, f"Error detecting posture: {str(e)}", {}
+    lifting = result["checks"]["lifting"]
+    return (
+        lifting["isGood"],
+        result["features"]["avg_knee_angle"],
+        lifting["message"],
+        result["checks"],
+    )
+
+
+def publish_posture(data, landmarks=None):
+    """Replace the latest posture result and bump its sequence number"""
+    global latest_posture_data, latest_landmarks, posture_seq
+    with posture_lock:
+        posture_seq += 1
+        latest_posture_data = data
+        latest_landmarks = landmarks
+
+
+def posture_response(data, landmarks=None, seq=0):
+    """JSON posture response, or a binary record if the client asked for one"""
+    if not posture_format.wants_binary(request.accept_mimetypes):
+        return jsonify(data)
+    record = posture_format.encode_record(
+        seq,
+        landmarks,
+        data.get("isGood"),
+        data.get("angle"),
+    )
+    return Response(record, mimetype=posture_format.MIME_TYPE)
+
+
 @app.route("/api/posture-check", methods=["POST"])
 def posture_check():
     try:
@@ -70,22 +283,24 @@ def posture_check():
             # Convert BGR to RGB
             image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
-            # Process the image
-            results = pose_static.process(image_rgb)
+            # Process the image with the model tier the current load allows
+            tier = load_governor.static_tier()
+            engine = get_static_engine(tier)
+            with load_governor.track(tier=tier):
+                results = engine.process(image_rgb)
 
+            landmarks = None
             if results.pose_landmarks:
+                landmarks = landmarks_to_array(results.pose_landmarks, np.float64)
                 # Call our posture checking function
-                # Draw pose landmarks
-                mp_drawing.draw_landmarks(
-                    image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS
-                )
-                is_good, angle, message = check_lifting_posture(results.pose_landmarks)
+                is_good, angle, message, checks = evaluate_posture(landmarks)
 
                 if is_good is not None:
                     result = {
                         "isGood": is_good,
                         "angle": float(angle),
                         "message": message,
+                        "checks": checks,
                         "landmarks_detected": True,
                     }
                 else:
@@ -96,7 +311,7 @@ def posture_check():
                     "landmarks_detected": False,
                 }
 
-            return jsonify(result)
+            return posture_response(result, landmarks)
 
         finally:
             # Clean up temporary file
@@ -109,8 +324,37 @@ def posture_check():
         return jsonify({"error": str(e)}), 500
 
 
+NDJSON_MIME_TYPE = "application/x-ndjson"
+
+
+def wants_item_stream():
+    """True if the client asked for items as they arrive (?stream=1 or NDJSON)"""
+    if request.args.get("stream") == "1":
+        return True
+    return (
+        request.accept_mimetypes.best_match(["application/json", NDJSON_MIME_TYPE])
+        == NDJSON_MIME_TYPE
+    )
+
+
+def ndjson_response(events):
+    """Stream dicts as newline-delimited JSON, flushing each line"""
+    return Response(
+        (json.dumps(event) + "\n" for event in events),
+        mimetype=NDJSON_MIME_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.route("/api/image-analysis", methods=["POST"])
 def image_analysis():
+    """Identify carried items in an image with Gemini
+
+    With ?stream=1 (or Accept: application/x-ndjson) the response is
+    newline-delimited JSON: one {"item": ...} line per item as soon as the
+    model has produced it, then a final {"result": ...} line with the full
+    analysis.
+    """
     try:
         # Get image from request
         if "image" not in request.files:
@@ -120,17 +364,31 @@ def image_analysis():
         if file.filename == "":
             return jsonify({"error": "No image selected"}), 400
 
+        stream = wants_item_stream()
+
         # Check if GOOGLE_API_KEY is available
         if not os.getenv("GOOGLE_API_KEY"):
-            return jsonify(
-                {
-                    "items": [],
-                    "person_detected": False,
-                    "analysis_notes": "Google API key not configured - skipping image analysis",
-                    "error": "API key missing",
-                }
+            result = {
+                "items": [],
+                "person_detected": False,
+                "analysis_notes": "Google API key not configured - skipping image analysis",
+                "error": "API key missing",
+            }
+            if stream:
+                return ndjson_response([{"result": result}])
+            return jsonify(result)
+
+        if stream:
+            # Streamed answers are not batched: the first item matters more
+            # than the total request count
+            return ndjson_response(
+                analyze_image_stream(file.read(), os.getenv("GOOGLE_API_KEY"))
             )
 
+        if analysis_batcher is not None:
+            # Share a multi-image request with other concurrent analyses
+            return jsonify(analysis_batcher.analyze(file.read()))
+
         # Save file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_file:
             file.save(tmp_file.name)
@@ -160,11 +418,39 @@ def image_analysis():
         )
 
 
+@app.route("/api/analysis-status", methods=["GET"])
+def get_analysis_status():
+    """Get Gemini micro-batching and lift-triggered analysis counters"""
+    return jsonify(
+        {
+            "batching": analysis_batcher is not None,
+            "batcher": analysis_batcher.status() if analysis_batcher else None,
+            "scheduler": (analysis_scheduler.status() if analysis_scheduler else None),
+        }
+    )
+
+
+@app.route("/api/stream-analysis", methods=["GET"])
+def get_stream_analysis():
+    """Get the latest lift-triggered item analysis of a stream"""
+    stream_id = request.args.get("stream_id", DEFAULT_STREAM)
+    if analysis_scheduler is None:
+        return jsonify({"error": "Automatic item analysis disabled"}), 404
+    result = analysis_scheduler.latest(stream_id)
+    if result is None:
+        return jsonify({"error": "No analysis yet"}), 404
+    return jsonify(result)
+
+
 @app.route("/api/video-stream")
 def video_stream():
-    """Stream processed video with MediaPipe pose overlay"""
+    """Stream processed video with MediaPipe pose overlay
+
+    Viewers may pass ?tier=full|medium|low or ?fps=N; otherwise the tier
+    adapts to how fast the viewer consumes frames.
+    """
     return Response(
-        generate_frames(),
+        generate_frames(ViewerPacer.from_args(request.args)),
         mimetype="multipart/x-mixed-replace; boundary=frame",
         headers={
             "Cache-Control": "no-cache, no-store, must-revalidate",
@@ -185,17 +471,38 @@ def upload_frame():
         if file.filename == "":
             return jsonify({"error": "No frame selected"}), 400
 
+        arrival_time = time.time()
+        stream_id = request.form.get("stream_id", DEFAULT_STREAM)
+        if not STREAM_ID_PATTERN.fullmatch(stream_id):
+            return jsonify({"error": "Invalid stream_id"}), 400
+        profiler.tag("decode", stream_id)
+
         # Read the frame
-        file_bytes = np.frombuffer(file.read(), np.uint8)
+        raw_bytes = file.read()
+        file_bytes = np.frombuffer(raw_bytes, np.uint8)
         frame = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
 
         if frame is None:
             return jsonify({"error": "Could not decode frame"}), 400
 
         # Process and store the frame globally
-        process_and_store_frame(frame)
+        processed, landmarks = process_and_store_frame(frame, stream_id)
 
-        return jsonify({"status": "success", "frame_count": frame_skip_counter})
+        if frame_capture.enabled:
+            try:
+                frame_capture.record(
+                    stream_id, arrival_time, raw_bytes, processed, landmarks
+                )
+            except Exception as capture_error:
+                print(f"Error capturing frame: {capture_error}")
+
+        return jsonify(
+            {
+                "status": "success",
+                "frame_count": frame_skip_counter,
+                "tier": load_governor.tier(stream_id)["name"],
+            }
+        )
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -204,7 +511,34 @@ def upload_frame():
 @app.route("/api/current-posture", methods=["GET"])
 def get_current_posture():
     """Get current posture data"""
-    return jsonify(latest_posture_data)
+    with posture_lock:
+        data, landmarks, seq = latest_posture_data, latest_landmarks, posture_seq
+    return posture_response(data, landmarks, seq)
+
+
+@app.route("/api/load-status", methods=["GET"])
+def get_load_status():
+    """Get load governor state and the active tier of each stream"""
+    return jsonify(load_governor.status())
+
+
+@app.route("/api/motion-gate", methods=["GET"])
+def get_motion_gate_status():
+    """Get gated vs inferred frame counters"""
+    return jsonify(motion_gate.status())
+
+
+@app.route("/api/capture-toggle", methods=["POST"])
+def toggle_capture():
+    """Toggle recording of uploaded frames to capture files"""
+    frame_capture.set_enabled(not frame_capture.enabled)
+    return jsonify(frame_capture.status())
+
+
+@app.route("/api/capture-status", methods=["GET"])
+def get_capture_status():
+    """Get capture mode state and the capture file of each stream"""
+    return jsonify(frame_capture.status())
 
 
 @app.route("/api/debug-toggle", methods=["POST"])
@@ -220,6 +554,25 @@ def toggle_debug():
     )
 
 
+@app.route("/api/debug-profile", methods=["POST"])
+def debug_profile():
+    """Sample all threads for ?seconds=N and return the aggregated stacks
+
+    The default response is collapsed-stack text (flamegraph.pl and
+    speedscope compatible); ?format=json returns the same counts as JSON.
+    """
+    seconds = min(request.args.get("seconds", 5.0, type=float), 60.0)
+    interval = max(request.args.get("interval_ms", 5.0, type=float), 1.0) / 1000
+    try:
+        counts = profiler.profile(seconds, interval)
+    except ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+
+    if request.args.get("format") == "json":
+        return jsonify({"samples": sum(counts.values()), "stacks": counts})
+    return Response(to_collapsed_text(counts), mimetype="text/plain")
+
+
 @app.route("/api/debug-status", methods=["GET"])
 def get_debug_status():
     """Get current debug mode status"""
@@ -265,8 +618,9 @@ def get_current_frame():
     if frame_to_send is not None:
         try:
             # Encode frame as JPEG
+            quality = load_governor.jpeg_quality(current_stream)
             ret, buffer = cv2.imencode(
-                ".jpg", frame_to_send, [cv2.IMWRITE_JPEG_QUALITY, 80]
+                ".jpg", frame_to_send, [cv2.IMWRITE_JPEG_QUALITY, quality]
             )
             if ret:
                 response = Response(
@@ -287,13 +641,26 @@ def get_current_frame():
         return jsonify({"error": "No frame available"}), 404
 
 
-def process_and_store_frame(frame):
-    """Process frame with MediaPipe and store globally"""
-    global current_frame, latest_posture_data, frame_skip_counter
+def process_and_store_frame(frame, stream_id=DEFAULT_STREAM):
+    """Process frame with MediaPipe and store globally
+
+    Returns:
+        tuple: (processed: bool, landmarks) where processed is False for
+               frames skipped for performance or that failed, and landmarks
+               is the (33, 4) landmark array or None if no pose was found
+    """
+    global current_frame, current_stream, frame_version, frame_skip_counter
 
     try:
         # Increment frame counter
         frame_skip_counter += 1
+        current_stream = stream_id
+
+        # Per-stream state is capped; evict the least recently used streams
+        release_streams(load_governor.admit(stream_id))
+
+        if frame_skip_counter % 500 == 0:
+            release_stale_streams()
 
         # Skip processing every few frames for performance if needed
         # Only process every other frame for better performance
@@ -303,196 +670,112 @@ def process_and_store_frame(frame):
                 if frame_lock.acquire(timeout=0.005):
                     try:
                         current_frame = frame.copy()
+                        frame_version += 1
                     finally:
                         frame_lock.release()
             except:
                 pass
-            return
-
-        # Convert BGR to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            return False, None
+
+        # Model tier and inference resolution for this stream
+        tier = load_governor.tier(stream_id)
+
+        # Skip inference entirely if the scene has not changed since the
+        # last inferred frame
+        profiler.tag("motion_gate", stream_id)
+        thumbnail = motion_gate.thumbnail(frame)
+        cached = motion_gate.reuse(stream_id, thumbnail)
+        if cached is not None:
+            posture, landmarks = cached
+            load_governor.touch(stream_id)
+        else:
+            profiler.tag("inference", stream_id)
+            engine = get_video_engine(stream_id, tier)
 
-        # Process with MediaPipe
-        results = pose_video.process(rgb_frame)
+            # Convert BGR to RGB for MediaPipe
+            inference_frame = resize_for_inference(frame, tier["inference_width"])
+            rgb_frame = cv2.cvtColor(inference_frame, cv2.COLOR_BGR2RGB)
 
-        # Convert back to BGR for OpenCV
-        annotated_frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+            # Process with MediaPipe
+            with load_governor.track(stream_id):
+                results = engine.process(rgb_frame)
 
-        # Draw pose landmarks
-        if results.pose_landmarks:
-            # Custom drawing specifications for better visibility
-            landmark_drawing_spec = mp_drawing.DrawingSpec(
-                color=(0, 255, 0),  # Green landmarks
-                thickness=6,
-                circle_radius=8,
-            )
-            connection_drawing_spec = mp_drawing.DrawingSpec(
-                color=(255, 0, 255),  # Magenta connections
-                thickness=4,
-                circle_radius=2,
+            profiler.tag("posture_rules", stream_id)
+            posture = None
+            landmarks = None
+            if results.pose_landmarks:
+                landmarks = landmarks_to_array(results.pose_landmarks, np.float64)
+                posture = evaluate_posture(landmarks)
+            motion_gate.update(stream_id, thumbnail, (posture, landmarks))
+
+        # Schedule item analysis on lift events (uses the clean frame)
+        profiler.tag("analysis_scheduler", stream_id)
+        if analysis_scheduler is not None:
+            analysis_scheduler.observe(
+                stream_id, frame, posture[3] if posture is not None else None
             )
 
-            # Draw the pose landmarks with custom specs
-            mp_drawing.draw_landmarks(
-                annotated_frame,
-                results.pose_landmarks,
-                mp_pose.POSE_CONNECTIONS,
-                landmark_drawing_spec=landmark_drawing_spec,
-                connection_drawing_spec=connection_drawing_spec,
-            )
+        # Annotate a full resolution copy
+        profiler.tag("annotate", stream_id)
+        annotated_frame = frame.copy()
 
-            # Draw landmark indices for debugging (key points only) - only if debug mode is on
-            # Skip detailed debug drawing every few frames for performance
-            if (
-                debug_mode and frame_skip_counter % 2 == 0
-            ):  # Draw debug info every other frame
-                debug_landmarks = [
-                    (23, "L_HIP"),
-                    (24, "R_HIP"),
-                    (25, "L_KNEE"),
-                    (26, "R_KNEE"),
-                    (27, "L_ANKLE"),
-                    (28, "R_ANKLE"),
-                    (11, "L_SHOULDER"),
-                    (12, "R_SHOULDER"),
-                    (13, "L_ELBOW"),
-                    (14, "R_ELBOW"),
-                    (15, "L_WRIST"),
-                    (16, "R_WRIST"),
-                    (0, "NOSE"),
-                    (9, "L_EAR"),
-                    (10, "R_EAR"),
-                ]
-
-                h, w, _ = annotated_frame.shape
-                for idx, label in debug_landmarks:
-                    if idx < len(results.pose_landmarks.landmark):
-                        landmark = results.pose_landmarks.landmark[idx]
-                        x = int(landmark.x * w)
-                        y = int(landmark.y * h)
-
-                        # Draw landmark index and label with background
-                        text = f"{idx}:{label}"
-                        text_size = cv2.getTextSize(
-                            text, cv2.FONT_HERSHEY_SIMPLEX, 0.4, 1
-                        )[0]
-                        cv2.rectangle(
-                            annotated_frame,
-                            (x + 10, y - 15),
-                            (x + 15 + text_size[0], y + 5),
-                            (0, 0, 0),
-                            -1,
-                        )
-                        cv2.putText(
-                            annotated_frame,
-                            text,
-                            (x + 12, y - 5),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.4,
-                            (255, 255, 0),
-                            1,
-                        )
+        # Draw pose landmarks
+        if landmarks is not None:
+            overlay.draw_skeleton(annotated_frame, landmarks)
 
-            # Check posture
-            is_good, angle, message = check_lifting_posture(results.pose_landmarks)
+            # Label key landmarks when debug mode is on
+            if debug_mode:
+                overlay.draw_debug_labels(annotated_frame, landmarks)
+
+            # Posture verdict (computed with the inference above, or reused)
+            is_good, angle, message, checks = posture
 
             if is_good is not None:
-                latest_posture_data = {
-                    "isGood": bool(is_good),  # Convert NumPy bool to Python bool
-                    "angle": float(angle),
-                    "message": str(message),
-                    "landmarks_detected": True,
-                }
+                publish_posture(
+                    {
+                        "isGood": bool(is_good),  # Convert NumPy bool to Python bool
+                        "angle": float(angle),
+                        "message": str(message),
+                        "checks": checks,
+                        "itemAnalysis": (
+                            analysis_scheduler.latest(stream_id)
+                            if analysis_scheduler is not None
+                            else None
+                        ),
+                        "landmarks_detected": True,
+                    },
+                    landmarks,
+                )
 
                 # Add posture info overlay with better visibility
-                color = (0, 255, 0) if is_good else (0, 0, 255)
-
-                # Add background rectangle for better text readability
-                cv2.rectangle(annotated_frame, (20, 20), (400, 120), (0, 0, 0), -1)
-                cv2.rectangle(annotated_frame, (20, 20), (400, 120), (255, 255, 255), 2)
-
-                cv2.putText(
-                    annotated_frame,
-                    f"Knee Angle: {int(angle)}°",
-                    (30, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.8,
-                    (0, 255, 255),  # Cyan for angle
-                    2,
-                )
-                cv2.putText(
-                    annotated_frame,
-                    message,
-                    (30, 80),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.8,
-                    color,
-                    2,
-                )
-                cv2.putText(
-                    annotated_frame,
-                    f"Landmarks: {len(results.pose_landmarks.landmark)}",
-                    (30, 110),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.6,
-                    (255, 255, 255),
-                    1,
+                overlay.draw_posture_banner(
+                    annotated_frame, angle, message, is_good, len(landmarks)
                 )
 
                 # Add debug info about key angles (only if debug mode is on)
                 if debug_mode:
-                    landmarks = results.pose_landmarks.landmark
-                    if len(landmarks) > 28:
-                        left_hip = landmarks[23]
-                        left_knee = landmarks[25]
-                        left_ankle = landmarks[27]
-                        right_hip = landmarks[24]
-                        right_knee = landmarks[26]
-                        right_ankle = landmarks[28]
-
-                        # Show landmark coordinates for debugging
-                        debug_info = [
-                            f"L_KNEE: ({left_knee.x:.2f}, {left_knee.y:.2f})",
-                            f"R_KNEE: ({right_knee.x:.2f}, {right_knee.y:.2f})",
-                            f"Visibility: L={left_knee.visibility:.2f} R={right_knee.visibility:.2f}",
-                            f"DEBUG MODE: ON | FPS: 24 | Frame: {frame_skip_counter}",
-                        ]
-
-                        for i, info in enumerate(debug_info):
-                            cv2.putText(
-                                annotated_frame,
-                                info,
-                                (420, 50 + i * 25),
-                                cv2.FONT_HERSHEY_SIMPLEX,
-                                0.5,
-                                (255, 255, 255),
-                                1,
-                            )
+                    overlay.draw_debug_info(
+                        annotated_frame, landmarks, frame_skip_counter
+                    )
             else:
-                latest_posture_data = {
-                    "error": str(message),
-                    "landmarks_detected": True,
-                }
+                publish_posture(
+                    {
+                        "error": str(message),
+                        "landmarks_detected": True,
+                    },
+                    landmarks,
+                )
         else:
-            latest_posture_data = {
-                "error": "No pose landmarks detected",
-                "landmarks_detected": False,
-            }
-            # Add background rectangle for error message
-            cv2.rectangle(annotated_frame, (20, 20), (350, 80), (0, 0, 0), -1)
-            cv2.rectangle(annotated_frame, (20, 20), (350, 80), (0, 0, 255), 2)
-
-            cv2.putText(
-                annotated_frame,
-                "No pose detected",
-                (30, 50),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.8,
-                (0, 0, 255),
-                2,
+            publish_posture(
+                {
+                    "error": "No pose landmarks detected",
+                    "landmarks_detected": False,
+                }
             )
+            overlay.draw_no_pose_banner(annotated_frame)
 
         # Store the processed frame - minimize lock time
+        profiler.tag("store", stream_id)
         processed_frame = annotated_frame.copy()
         try:
             if frame_lock.acquire(
@@ -500,6 +783,7 @@ def process_and_store_frame(frame):
             ):  # 5ms timeout to prevent blocking stream
                 try:
                     current_frame = processed_frame
+                    frame_version += 1
                 finally:
                     frame_lock.release()
             else:
@@ -507,6 +791,8 @@ def process_and_store_frame(frame):
         except Exception as lock_error:
             print(f"Error acquiring frame lock: {lock_error}")
 
+        return True, landmarks
+
     except Exception as e:
         print(f"Error processing frame: {e}")
         # Store an error frame so the stream doesn't freeze
@@ -524,17 +810,18 @@ def process_and_store_frame(frame):
             if frame_lock.acquire(timeout=0.005):
                 try:
                     current_frame = error_frame
+                    frame_version += 1
                 finally:
                     frame_lock.release()
         except:
             pass  # If error frame also fails, just continue
+        return False, None
 
 
-def generate_frames():
-    """Generate frames for video streaming"""
-    global current_frame, default_frame
+def get_default_frame():
+    """Frame shown while no camera frame has been uploaded yet"""
+    global default_frame
 
-    # Initialize default frame if not set
     if default_frame is None:
         default_frame = np.zeros((480, 640, 3), dtype=np.uint8)
         # Add "Waiting for camera..." text to default frame
@@ -547,76 +834,110 @@ def generate_frames():
             (255, 255, 255),
             2,
         )
+    return default_frame
 
-    while True:
-        frame_to_send = None
 
-        # Try to get current frame with timeout to prevent blocking
-        try:
-            # Use timeout to prevent indefinite blocking
-            if frame_lock.acquire(timeout=0.01):  # 10ms timeout
-                try:
-                    if current_frame is not None:
-                        frame_to_send = current_frame.copy()
-                    else:
-                        frame_to_send = default_frame.copy()
-                finally:
-                    frame_lock.release()
-            else:
-                # If can't acquire lock, use default frame
-                frame_to_send = default_frame.copy()
+def generate_frames(pacer):
+    """Generate frames for video streaming at the viewer's rendition tier"""
+    rendition_cache.add_viewer(pacer)
+    try:
+        while True:
+            version = None
+            frame_to_send = None
+
+            # Try to get current frame with timeout to prevent blocking.
+            # Stored frames are never modified in place, so holding a
+            # reference is enough.
+            profiler.tag(f"stream_encode:{pacer.rendition['name']}")
+            try:
+                # Use timeout to prevent indefinite blocking
+                if frame_lock.acquire(timeout=0.01):  # 10ms timeout
+                    try:
+                        version = frame_version
+                        if current_frame is not None:
+                            frame_to_send = current_frame
+                        else:
+                            frame_to_send = get_default_frame()
+                    finally:
+                        frame_lock.release()
+                # If the lock is busy, drop this tick rather than wait
 
-        except Exception as e:
-            print(f"Error accessing frame: {e}")
-            frame_to_send = default_frame.copy()
+            except Exception as e:
+                print(f"Error accessing frame: {e}")
+                version = -1
+                frame_to_send = get_default_frame()
 
-        # Encode and send frame
-        try:
-            if frame_to_send is not None:
-                ret, buffer = cv2.imencode(
-                    ".jpg", frame_to_send, [cv2.IMWRITE_JPEG_QUALITY, 75]
-                )
-                if ret:
-                    frame_bytes = buffer.tobytes()
+            # Encode (once per frame and tier) and send frame
+            try:
+                if frame_to_send is not None and pacer.should_send(version):
+                    frame_bytes = rendition_cache.get(
+                        pacer.rendition,
+                        version,
+                        frame_to_send,
+                        load_governor.jpeg_quality(current_stream),
+                    )
+                    start = time.perf_counter()
                     yield (
                         b"--frame\r\n"
                         b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
                     )
-                else:
-                    print("Failed to encode frame")
+                    # Time spent blocked in the write to this viewer
+                    pacer.sent(version, time.perf_counter() - start)
 
-        except Exception as e:
-            print(f"Error in frame generation: {e}")
-            # Yield a minimal error frame
-            try:
-                error_frame = np.zeros((240, 320, 3), dtype=np.uint8)
-                cv2.putText(
-                    error_frame,
-                    "Stream Error",
-                    (50, 120),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1,
-                    (0, 0, 255),
-                    2,
-                )
-                ret, buffer = cv2.imencode(
-                    ".jpg", error_frame, [cv2.IMWRITE_JPEG_QUALITY, 50]
-                )
-                if ret:
-                    frame_bytes = buffer.tobytes()
-                    yield (
-                        b"--frame\r\n"
-                        b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
+            except Exception as e:
+                print(f"Error in frame generation: {e}")
+                # Yield a minimal error frame
+                try:
+                    error_frame = np.zeros((240, 320, 3), dtype=np.uint8)
+                    cv2.putText(
+                        error_frame,
+                        "Stream Error",
+                        (50, 120),
+                        cv2.FONT_HERSHEY_SIMPLEX,
+                        1,
+                        (0, 0, 255),
+                        2,
                     )
-            except:
-                pass  # If even error frame fails, continue loop
+                    ret, buffer = cv2.imencode(
+                        ".jpg", error_frame, [cv2.IMWRITE_JPEG_QUALITY, 50]
+                    )
+                    if ret:
+                        frame_bytes = buffer.tobytes()
+                        yield (
+                            b"--frame\r\n"
+                            b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
+                        )
+                except:
+                    pass  # If even error frame fails, continue loop
+
+            profiler.tag("stream_wait")
+            pacer.wait()
+    finally:
+        rendition_cache.remove_viewer(pacer)
 
-        time.sleep(0.042)  # ~24 FPS
+
+@app.route("/api/stream-status", methods=["GET"])
+def get_stream_status():
+    """Get viewer counts and encode counts per rendition tier"""
+    return jsonify(rendition_cache.status())
 
 
 @app.route("/health", methods=["GET"])
 def health_check():
-    return jsonify({"status": "healthy"})
+    return jsonify({"status": "healthy", "readiness": readiness.status()})
+
+
+@app.route("/health/ready", methods=["GET"])
+def readiness_check():
+    """Readiness probe - 503 until the pose engines are loaded
+
+    Polling the probe starts the warm-up of the POSE_ENGINES engines if
+    POSE_WARMUP did not already; /health reports who started it.
+    """
+    if not readiness.ready:
+        readiness.start_warm_up(started_by="readiness probe")
+    status = readiness.status()
+    return jsonify(status), (200 if status["ready"] else 503)
 
 
 if __name__ == "__main__":
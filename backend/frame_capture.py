@@ -0,0 +1,182 @@
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+import numpy as np
+
+# Capture file layout (little endian):
+#
+#   file header:  4s magic b"PSCP", H version, H reserved
+#   record:       I length of the rest of the record
+#                 d arrival timestamp (time.time())
+#                 B flags (FLAG_*)
+#                 I JPEG length, followed by the JPEG bytes as uploaded
+#                 33 x 4 float32 landmarks, only if FLAG_LANDMARKS is set
+#
+# A record cut short by a crash is ignored when reading.
+
+MAGIC = b"PSCP"
+VERSION = 1
+
+FLAG_PROCESSED = 0x01  # The frame went through pose inference (or the gate)
+FLAG_LANDMARKS = 0x02  # Landmarks were detected and are stored
+
+FILE_HEADER = struct.Struct("<4sHH")
+RECORD_LENGTH = struct.Struct("<I")
+RECORD_HEADER = struct.Struct("<dBI")
+LANDMARKS_DTYPE = np.dtype("<f4")
+LANDMARKS_SIZE = 33 * 4 * LANDMARKS_DTYPE.itemsize
+
+
+class CaptureWriter:
+    """Appends frames of one stream to a capture file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab")
+        if is_new:
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION, 0))
+        self.records = 0
+
+    def write(self, timestamp, jpeg_bytes, processed, landmarks=None):
+        flags = FLAG_PROCESSED if processed else 0
+        landmark_bytes = b""
+        if landmarks is not None:
+            flags |= FLAG_LANDMARKS
+            landmark_bytes = np.asarray(landmarks, dtype=LANDMARKS_DTYPE).tobytes()
+        header = RECORD_HEADER.pack(timestamp, flags, len(jpeg_bytes))
+        length = len(header) + len(jpeg_bytes) + len(landmark_bytes)
+        with self._lock:
+            self._file.write(RECORD_LENGTH.pack(length))
+            self._file.write(header)
+            self._file.write(jpeg_bytes)
+            self._file.write(landmark_bytes)
+            self._file.flush()
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class FrameCapture:
+    """Optional per-stream capture of uploaded frames.
+
+    Each stream gets its own file in directory, named after the stream id
+    and the time capture started for it.
+    """
+
+    def __init__(self, directory, enabled=False):
+        self.directory = directory
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._writers = {}
+
+    @classmethod
+    def from_env(cls):
+        """Capture into CAPTURE_DIR; enabled at startup if CAPTURE_ENABLED=1"""
+        return cls(
+            os.getenv("CAPTURE_DIR", "captures"),
+            enabled=os.getenv("CAPTURE_ENABLED", "0") == "1",
+        )
+
+    def _writer(self, stream_id):
+        writer = self._writers.get(stream_id)
+        if writer is None:
+            with self._lock:
+                writer = self._writers.get(stream_id)
+                if writer is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", stream_id)
+                    started = time.strftime("%Y%m%d-%H%M%S")
+                    path = os.path.join(self.directory, f"{safe_id}-{started}.cap")
+                    writer = CaptureWriter(path)
+                    self._writers[stream_id] = writer
+        return writer
+
+    def record(self, stream_id, timestamp, jpeg_bytes, processed, landmarks=None):
+        if not self.enabled:
+            return
+        self._writer(stream_id).write(timestamp, jpeg_bytes, processed, landmarks)
+
+    def close(self, stream_id=None):
+        """Close the file of one stream, or of all streams"""
+        with self._lock:
+            if stream_id is None:
+                writers = list(self._writers.values())
+                self._writers.clear()
+            else:
+                writer = self._writers.pop(stream_id, None)
+                writers = [writer] if writer else []
+        for writer in writers:
+            writer.close()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.close()
+
+    def status(self):
+        with self._lock:
+            files = {
+                stream_id: {"path": writer.path, "records": writer.records}
+                for stream_id, writer in self._writers.items()
+            }
+        return {"enabled": self.enabled, "directory": self.directory, "streams": files}
+
+
+class CaptureRecord:
+    __slots__ = ("timestamp", "processed", "jpeg", "landmarks")
+
+    def __init__(self, timestamp, processed, jpeg, landmarks):
+        self.timestamp = timestamp
+        self.processed = processed
+        self.jpeg = jpeg
+        self.landmarks = landmarks
+
+
+def read_capture(path):
+    """Iterate over the records of a capture file through a memory map.
+
+    Only the record being yielded is paged in; JPEG payloads are returned
+    as bytes and landmarks as (33, 4) float32 arrays.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < FILE_HEADER.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from _iter_records(mapped)
+
+
+def _iter_records(mapped):
+    magic, version, _ = FILE_HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a frame capture file")
+    offset = FILE_HEADER.size
+    size = len(mapped)
+    while offset + RECORD_LENGTH.size <= size:
+        (length,) = RECORD_LENGTH.unpack_from(mapped, offset)
+        start = offset + RECORD_LENGTH.size
+        end = start + length
+        if end > size:
+            break  # Truncated tail
+        timestamp, flags, jpeg_length = RECORD_HEADER.unpack_from(mapped, start)
+        jpeg_start = start + RECORD_HEADER.size
+        jpeg_end = jpeg_start + jpeg_length
+        landmarks = None
+        if flags & FLAG_LANDMARKS:
+            landmarks = np.frombuffer(
+                mapped[jpeg_end : jpeg_end + LANDMARKS_SIZE], dtype=LANDMARKS_DTYPE
+            ).reshape(33, 4)
+        yield CaptureRecord(
+            timestamp,
+            bool(flags & FLAG_PROCESSED),
+            mapped[jpeg_start:jpeg_end],
+            landmarks,
+        )
+        offset = end
@@ -1,12 +1,14 @@
 import argparse
 import base64
-from google import genai
-from google.genai import types
 import mimetypes
-import requests
 import os
 import json
 
+from json_stream import ItemStreamParser
+
+# google.genai and requests are imported lazily where they are used, so that
+# importing this module (e.g. from backend_server) stays cheap
+
 prompt = """
             Analyze this image and identify any items that a person is carrying, holding, or wearing as accessories. 
             Focus on:
@@ -42,6 +44,182 @@ prompt = """
             """
 
 
+API_BASE = os.getenv(
+    "GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta"
+)
+MODEL = "gemini-2.5-flash"
+# Seconds to wait for Gemini to connect and to send data
+REQUEST_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "30"))
+
+
+def image_part(image_bytes, mime_type="image/jpeg"):
+    """Inline image part for a generateContent request"""
+    return {
+        "inline_data": {
+            "mime_type": mime_type,
+            "data": base64.b64encode(image_bytes).decode("utf-8"),
+        }
+    }
+
+
+def generate_content(parts, api_key, api_base=None):
+    """Send one generateContent request and return the response text"""
+    import requests
+
+    # Construct REST API request
+    url = f"{api_base or API_BASE}/models/{MODEL}:generateContent?key={api_key}"
+
+    headers = {
+        "Content-Type": "application/json",
+    }
+
+    payload = {"contents": [{"parts": parts}]}
+
+    # Make API call to Gemini
+    response = requests.post(
+        url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT
+    )
+
+    if response.status_code == 200:
+        result = response.json()
+        if "candidates" in result and len(result["candidates"]) > 0:
+            return result["candidates"][0]["content"]["parts"][0]["text"]
+        else:
+            raise Exception("Unexpected API response format")
+    else:
+        raise Exception(f"API call failed: {response.status_code} - {response.text}")
+
+
+def stream_content(parts, api_key, api_base=None):
+    """Send one streamGenerateContent request and yield the text as it arrives"""
+    import requests
+
+    url = (
+        f"{api_base or API_BASE}/models/{MODEL}:streamGenerateContent"
+        f"?alt=sse&key={api_key}"
+    )
+
+    headers = {
+        "Content-Type": "application/json",
+    }
+
+    payload = {"contents": [{"parts": parts}]}
+
+    # With stream=True the timeout applies to connecting and to each read,
+    # so a long answer is fine but a stalled one is not
+    with requests.post(
+        url, headers=headers, json=payload, stream=True, timeout=REQUEST_TIMEOUT
+    ) as response:
+        if response.status_code != 200:
+            raise Exception(
+                f"API call failed: {response.status_code} - {response.text}"
+            )
+        # Server-sent events: one "data: <GenerateContentResponse>" per chunk
+        for line in response.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+            chunk = json.loads(line[5:].decode("utf-8"))
+            for candidate in chunk.get("candidates", [])[:1]:
+                for part in candidate.get("content", {}).get("parts", []):
+                    if "text" in part:
+                        yield part["text"]
+
+
+def strip_code_fences(response_text):
+    """Remove markdown code blocks around a JSON response, if present"""
+    cleaned_text = response_text.strip()
+    if cleaned_text.startswith("```json"):
+        # Remove ```json at the start and ``` at the end
+        cleaned_text = cleaned_text[7:]  # Remove ```json
+        if cleaned_text.endswith("```"):
+            cleaned_text = cleaned_text[:-3]  # Remove ```
+        cleaned_text = cleaned_text.strip()
+    elif cleaned_text.startswith("```"):
+        # Remove ``` at the start and end
+        lines = cleaned_text.split("\n")
+        if lines[0] == "```":
+            lines = lines[1:]
+        if lines[-1] == "```":
+            lines = lines[:-1]
+        cleaned_text = "\n".join(lines)
+    return cleaned_text
+
+
+def parse_analysis_text(response_text):
+    """Parse the model's JSON answer for one image"""
+    try:
+        return json.loads(strip_code_fences(response_text))
+    except json.JSONDecodeError:
+        # Keep whatever items were complete before the answer went wrong
+        parser = ItemStreamParser()
+        parser.feed(response_text)
+        return finish_analysis(parser)
+
+
+def finish_analysis(parser):
+    """Final result of a streamed answer, recovering partial answers"""
+    result, recovered = parser.finish()
+    if result is None:
+        # If JSON parsing fails, create a structured response
+        return {
+            "items": [],
+            "person_detected": False,
+            "analysis_notes": f"Raw response: {parser.text}",
+            "parsing_error": True,
+        }
+    if recovered:
+        result = {
+            "person_detected": False,
+            "analysis_notes": "",
+            **result,
+            "parsing_error": True,
+            "recovered": True,
+        }
+    return result
+
+
+def analyze_image_bytes(image_bytes, api_key, mime_type="image/jpeg", api_base=None):
+    """Identify carried items in one image with a single Gemini request"""
+    response_text = generate_content(
+        [{"text": prompt}, image_part(image_bytes, mime_type)], api_key, api_base
+    )
+    return parse_analysis_text(response_text)
+
+
+def analyze_image_stream(image_bytes, api_key, mime_type="image/jpeg", api_base=None):
+    """Identify carried items in one image, yielding items as they complete.
+
+    Yields {"item": {...}} for every entry of the answer's items list as
+    soon as it has streamed in, then {"result": {...}} with the full
+    analysis. Errors do not raise: a stream that fails part way through
+    ends with the items received so far and an "error" field.
+    """
+    parser = ItemStreamParser()
+    error = None
+    try:
+        for text in stream_content(
+            [{"text": prompt}, image_part(image_bytes, mime_type)],
+            api_key,
+            api_base,
+        ):
+            for item in parser.feed(text):
+                yield {"item": item}
+    except Exception as e:
+        error = str(e)
+
+    if error is not None and not parser.text:
+        result = {
+            "items": [],
+            "person_detected": False,
+            "analysis_notes": f"Error: {error}",
+        }
+    else:
+        result = finish_analysis(parser)
+    if error is not None:
+        result["error"] = error
+    yield {"result": result}
+
+
 class ImageAnalysis:
     def __init__(self, image_path, api_key):
         self.image_path = image_path
@@ -50,6 +228,8 @@ class ImageAnalysis:
         # Check if it's a URL or local file path
         if image_path.startswith(("http://", "https://")):
             # Handle URL
+            import requests
+
             self.image_bytes = requests.get(image_path).content
         else:
             # Handle local file
@@ -61,8 +241,24 @@ class ImageAnalysis:
         if mime_type is None or not mime_type.startswith("image/"):
             # Default to jpeg if we can't determine the type
             mime_type = "image/jpeg"
-        self.client = genai.Client(api_key=api_key)
-        self.image = self.client.files.upload(file=self.image_path)
+        self._client = None
+        self._image = None
+
+    @property
+    def client(self):
+        """Gemini client, created on first access"""
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
+    @property
+    def image(self):
+        """Image uploaded through the Files API, uploaded on first access"""
+        if self._image is None:
+            self._image = self.client.files.upload(file=self.image_path)
+        return self._image
 
     def analyze(self) -> dict:
         """Analyze image to identify carried items"""
@@ -81,85 +277,27 @@ class ImageAnalysis:
         else:
             mime_type = "image/jpeg"  # Default fallback
 
-        # Encode image to base64
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-
-        # Create the prompt for item identification
-        # Construct REST API request
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={self.api_key}"
-
-        headers = {
-            "Content-Type": "application/json",
-        }
-
-        payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {"text": prompt},
-                        {
-                            "inline_data": {
-                                "mime_type": mime_type,
-                                "data": image_base64,
-                            }
-                        },
-                    ]
-                }
-            ]
-        }
-
-        # Make API call to Gemini
-        response = requests.post(url, headers=headers, json=payload)
+        return analyze_image_bytes(image_bytes, self.api_key, mime_type)
 
-        if response.status_code == 200:
-            result = response.json()
-            if "candidates" in result and len(result["candidates"]) > 0:
-                response_text = result["candidates"][0]["content"]["parts"][0]["text"]
-            else:
-                raise Exception("Unexpected API response format")
-        else:
-            raise Exception(
-                f"API call failed: {response.status_code} - {response.text}"
-            )
-
-        try:
-            # Clean the response text (remove markdown code blocks if present)
-            cleaned_text = response_text.strip()
-            if cleaned_text.startswith("```json"):
-                # Remove ```json at the start and ``` at the end
-                cleaned_text = cleaned_text[7:]  # Remove ```json
-                if cleaned_text.endswith("```"):
-                    cleaned_text = cleaned_text[:-3]  # Remove ```
-                cleaned_text = cleaned_text.strip()
-            elif cleaned_text.startswith("```"):
-                # Remove ``` at the start and end
-                lines = cleaned_text.split("\n")
-                if lines[0] == "```":
-                    lines = lines[1:]
-                if lines[-1] == "```":
-                    lines = lines[:-1]
-                cleaned_text = "\n".join(lines)
-
-                # Try to parse as JSON
-            analysis_result = json.loads(cleaned_text)
-        except json.JSONDecodeError:
-            # If JSON parsing fails, create a structured response
-            analysis_result = {
-                "items": [],
-                "person_detected": False,
-                "analysis_notes": f"Raw response: {response_text}",
-                "parsing_error": True,
-            }
-        return analysis_result
+    def analyze_stream(self):
+        """Like analyze(), but yields items as they arrive (see analyze_image_stream)"""
+        return analyze_image_stream(self.image_bytes, self.api_key)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("-i", "--image", type=str, required=True)
+    parser.add_argument(
+        "--stream", action="store_true", help="Print items as they arrive"
+    )
     args = parser.parse_args()
 
     image_analysis = ImageAnalysis(
         args.image,
         api_key=os.getenv("GOOGLE_API_KEY"),
     )
-    print(image_analysis.analyze())
+    if args.stream:
+        for event in image_analysis.analyze_stream():
+            print(json.dumps(event), flush=True)
+    else:
+        print(image_analysis.analyze())
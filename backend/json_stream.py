@@ -0,0 +1,130 @@
+import json
+
+_WHITESPACE = " \t\r\n"
+
+
+class ItemStreamParser:
+    """Incremental, tolerant parser for the model's streamed JSON answer.
+
+    Text is fed in chunks as it arrives. The parser scans each character
+    once, keeping only a stack of open containers, and returns every entry
+    of the top-level "items" array as soon as its closing brace arrives.
+    Other fields of the top-level object (person_detected,
+    analysis_notes, ...) are collected the same way. Text before the first
+    "{" or after the object closes - such as a ```json fence - is ignored.
+
+    If the answer does not parse as a whole, finish() falls back to the
+    items and fields that were complete, so a malformed or cut-off tail
+    loses only the unfinished part.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.items = []
+        self.fields = {}
+        self._pos = 0
+        self._stack = []  # "{" or "[" for each open container
+        self._in_string = False
+        self._escape = False
+        self._start = None  # Span of the top-level object
+        self._end = None
+        self._key_start = None
+        self._key = None  # Current key of the top-level object
+        self._value_start = None  # Start of the current top-level value
+        self._in_items = False
+        self._item_start = None
+
+    def feed(self, chunk):
+        """Add text; returns the items completed by it"""
+        self.text += chunk
+        completed = []
+        text = self.text
+        for pos in range(self._pos, len(text)):
+            if self._end is not None:
+                break
+            char = text[pos]
+            depth = len(self._stack)
+
+            if depth == 0:
+                if char == "{":
+                    self._start = pos
+                    self._stack.append(char)
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = _loads(text[self._key_start : pos + 1])
+                        self._key_start = None
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if depth == 1 and self._value_start is None:
+                    self._key_start = pos
+            elif char == ":" and depth == 1:
+                self._value_start = pos + 1
+            elif char in "{[":
+                if depth == 1 and self._key == "items" and char == "[":
+                    self._in_items = True
+                elif depth == 2 and self._in_items and char == "{":
+                    self._item_start = pos
+                self._stack.append(char)
+            elif char in "}]":
+                self._stack.pop()
+                if depth == 3 and self._item_start is not None:
+                    item = _loads(text[self._item_start : pos + 1])
+                    if isinstance(item, dict):
+                        self.items.append(item)
+                        completed.append(item)
+                    self._item_start = None
+                elif depth == 2:
+                    self._in_items = False
+                elif depth == 1:
+                    self._end_field(text, pos)
+                    self._end = pos + 1
+            elif char == "," and depth == 1:
+                self._end_field(text, pos)
+
+        self._pos = len(text)
+        return completed
+
+    def _end_field(self, text, pos):
+        """Record the top-level value ending at pos"""
+        if self._value_start is not None and self._key != "items":
+            value = _loads(text[self._value_start : pos].strip(_WHITESPACE))
+            if value is not _INVALID and isinstance(self._key, str):
+                self.fields[self._key] = value
+        self._value_start = None
+        self._key = None
+
+    def finish(self):
+        """The parsed answer, or None if nothing usable was found.
+
+        Returns:
+            tuple: (result dict, recovered) where recovered is True if the
+                   answer was malformed and result holds only the complete
+                   items and fields
+        """
+        if self._end is not None:
+            result = _loads(self.text[self._start : self._end])
+            if isinstance(result, dict):
+                return result, False
+        if not self.items and not self.fields:
+            return None, False
+        return dict(self.fields, items=list(self.items)), True
+
+
+_INVALID = object()
+
+
+def _loads(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return _INVALID
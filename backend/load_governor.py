@@ -0,0 +1,277 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Quality tiers, most accurate first. Each video session runs on exactly one
+# tier at a time; the governor moves it up or down the list based on load.
+# latency_cost is the tier's expected inference cost relative to "fast"; a
+# tier's latency budget is the governor's target latency times this cost.
+TIERS = [
+    {
+        "name": "accurate",
+        "latency_cost": 2.5,
+        "model_complexity": 2,
+        "inference_width": None,  # Full resolution
+        "jpeg_quality": 85,
+        "min_detection_confidence": 0.5,
+        "min_tracking_confidence": 0.5,
+    },
+    {
+        "name": "balanced",
+        "latency_cost": 1.5,
+        "model_complexity": 1,
+        "inference_width": 640,
+        "jpeg_quality": 80,
+        "min_detection_confidence": 0.4,
+        "min_tracking_confidence": 0.4,
+    },
+    {
+        "name": "fast",
+        "latency_cost": 1.0,
+        "model_complexity": 0,
+        "inference_width": 480,
+        "jpeg_quality": 75,
+        "min_detection_confidence": 0.3,
+        "min_tracking_confidence": 0.3,
+    },
+    {
+        "name": "minimal",
+        "latency_cost": 0.6,
+        "model_complexity": 0,
+        "inference_width": 320,
+        "jpeg_quality": 55,
+        "min_detection_confidence": 0.3,
+        "min_tracking_confidence": 0.3,
+    },
+]
+
+TIER_INDEX = {tier["name"]: i for i, tier in enumerate(TIERS)}
+
+
+class _Session:
+    def __init__(self, tier_index, now):
+        self.tier_index = tier_index
+        self.latency_ewma = None
+        self.frames = 0
+        self.last_seen = now
+        self.last_switch = now
+        self.upgrade_after = now
+
+
+class LoadGovernor:
+    """Switches video sessions between quality tiers based on load.
+
+    Load for a session is the larger of its inference latency relative to
+    the latency budget of its current tier and the number of frames in
+    flight across all sessions relative to the queue budget. Budgets scale
+    with each tier's latency_cost, so the normal cost of a heavier model
+    does not count as overload. Above high_watermark the session
+    drops one tier, below low_watermark it climbs one tier, with a cooldown
+    between switches. After a downgrade the session waits upgrade_backoff
+    seconds before climbing again, so a tier it cannot sustain is not
+    retried on every cooldown.
+
+    At most max_sessions sessions are tracked; admit() evicts the least
+    recently seen ones beyond that.
+    """
+
+    def __init__(
+        self,
+        target_latency=0.06,
+        max_in_flight=4,
+        high_watermark=1.0,
+        low_watermark=0.5,
+        switch_cooldown=2.0,
+        upgrade_backoff=30.0,
+        start_tier="fast",
+        alpha=0.2,
+        max_sessions=16,
+    ):
+        self.target_latency = target_latency
+        self.max_in_flight = max_in_flight
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.switch_cooldown = switch_cooldown
+        self.upgrade_backoff = upgrade_backoff
+        self.start_tier = TIER_INDEX[start_tier]
+        self.alpha = alpha
+        self.max_sessions = max_sessions
+
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self.in_flight = 0
+        self.latency_ewma = None
+        self.latency_load_ewma = None  # Latency relative to tier budgets
+
+    @classmethod
+    def from_env(cls):
+        """Build a governor configured from GOVERNOR_* environment variables"""
+        return cls(
+            target_latency=float(os.getenv("GOVERNOR_TARGET_LATENCY_MS", "60")) / 1000,
+            max_in_flight=int(os.getenv("GOVERNOR_MAX_IN_FLIGHT", "4")),
+            switch_cooldown=float(os.getenv("GOVERNOR_SWITCH_COOLDOWN", "2.0")),
+            start_tier=os.getenv("GOVERNOR_START_TIER", "fast"),
+            max_sessions=int(os.getenv("GOVERNOR_MAX_STREAMS", "16")),
+        )
+
+    def _session(self, session_id, now):
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = _Session(self.start_tier, now)
+            self._sessions[session_id] = session
+        return session
+
+    def admit(self, session_id):
+        """Mark a session as active, evicting the least recently seen
+        sessions beyond max_sessions.
+
+        Returns the ids of the evicted sessions, whose per-stream state the
+        caller should release.
+        """
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            self._session(session_id, now).last_seen = now
+            while len(self._sessions) > self.max_sessions:
+                oldest = min(
+                    self._sessions, key=lambda sid: self._sessions[sid].last_seen
+                )
+                del self._sessions[oldest]
+                evicted.append(oldest)
+        return evicted
+
+    def tier(self, session_id):
+        """Return the tier dict currently assigned to a session"""
+        with self._lock:
+            return TIERS[self._session(session_id, time.monotonic()).tier_index]
+
+    def touch(self, session_id):
+        """Mark a session as active without recording an inference"""
+        now = time.monotonic()
+        with self._lock:
+            self._session(session_id, now).last_seen = now
+
+    def jpeg_quality(self, session_id):
+        return self.tier(session_id)["jpeg_quality"]
+
+    def load(self):
+        """Box-wide load score used for requests that have no session"""
+        with self._lock:
+            return self._load(self.latency_load_ewma)
+
+    def latency_budget(self, tier):
+        return self.target_latency * tier["latency_cost"]
+
+    def _load(self, latency_load):
+        queue_load = self.in_flight / self.max_in_flight
+        return max(latency_load or 0.0, queue_load)
+
+    def static_tier(self):
+        """Tier for one-off static checks, chosen from the box-wide load"""
+        load = self.load()
+        if load < self.low_watermark:
+            return TIERS[0]
+        if load < self.high_watermark:
+            return TIERS[1]
+        return TIERS[TIER_INDEX["fast"]]
+
+    @contextmanager
+    def track(self, session_id=None, tier=None):
+        """Count an inference as in flight and record its latency.
+
+        Inferences without a session (static checks) only feed the box-wide
+        statistics, measured against the budget of the given tier. Failed
+        inferences are not recorded.
+        """
+        with self._lock:
+            self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        self.record_latency(session_id, time.perf_counter() - start, tier)
+
+    def record_latency(self, session_id, seconds, tier=None):
+        """Feed one inference latency and re-evaluate the session's tier"""
+        now = time.monotonic()
+        with self._lock:
+            self.latency_ewma = self._ewma(self.latency_ewma, seconds)
+            if session_id is None:
+                tier = tier or TIERS[TIER_INDEX["fast"]]
+                self.latency_load_ewma = self._ewma(
+                    self.latency_load_ewma, seconds / self.latency_budget(tier)
+                )
+                return
+            session = self._session(session_id, now)
+            budget = self.latency_budget(TIERS[session.tier_index])
+            self.latency_load_ewma = self._ewma(
+                self.latency_load_ewma, seconds / budget
+            )
+            session.frames += 1
+            session.last_seen = now
+            session.latency_ewma = self._ewma(session.latency_ewma, seconds)
+
+            if now - session.last_switch < self.switch_cooldown:
+                return
+            load = self._load(session.latency_ewma / budget)
+            if load > self.high_watermark and session.tier_index < len(TIERS) - 1:
+                session.tier_index += 1
+                session.upgrade_after = now + self.upgrade_backoff
+            elif (
+                load < self.low_watermark
+                and session.tier_index > 0
+                and now >= session.upgrade_after
+            ):
+                session.tier_index -= 1
+            else:
+                return
+            session.last_switch = now
+            # Latency of the old tier says little about the new one
+            session.latency_ewma = None
+
+    def _ewma(self, current, sample):
+        if current is None:
+            return sample
+        return current + self.alpha * (sample - current)
+
+    def prune(self, max_idle=60.0):
+        """Forget sessions that have not sent a frame recently.
+
+        Returns the ids of the removed sessions.
+        """
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                session_id
+                for session_id, session in self._sessions.items()
+                if now - session.last_seen > max_idle
+            ]
+            for session_id in stale:
+                del self._sessions[session_id]
+        return stale
+
+    def status(self):
+        with self._lock:
+            return {
+                "load": self._load(self.latency_load_ewma),
+                "in_flight": self.in_flight,
+                "latency_ms": _ms(self.latency_ewma),
+                "sessions": {
+                    session_id: {
+                        "tier": TIERS[session.tier_index]["name"],
+                        "latency_ms": _ms(session.latency_ewma),
+                        "budget_ms": _ms(
+                            self.latency_budget(TIERS[session.tier_index])
+                        ),
+                        "frames": session.frames,
+                    }
+                    for session_id, session in self._sessions.items()
+                },
+            }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
@@ -0,0 +1,107 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+
+class _StreamState:
+    def __init__(self):
+        self.thumbnail = None
+        self.cached = None
+        self.gated_in_a_row = 0
+        self.gated = 0
+        self.inferred = 0
+
+
+class MotionGate:
+    """Skips pose inference when a stream's scene has not changed.
+
+    Each frame is reduced to a tiny grayscale thumbnail, one cell per block
+    of pixels, and compared with the thumbnail of the last frame that was
+    actually inferred. A cell counts as changed when its gray level moved by
+    at least threshold (0-255); the previous inference result is reused
+    only while no more than max_changed_cells cells changed. Counting cells
+    rather than averaging over the frame means a person who fills a small
+    part of the picture still registers when they move. After
+    max_gated_frames reuses in a row the next frame is inferred regardless,
+    so slow drifts are picked up eventually.
+    """
+
+    def __init__(
+        self, threshold=15.0, max_changed_cells=0, size=(32, 24), max_gated_frames=48
+    ):
+        self.threshold = threshold
+        self.max_changed_cells = max_changed_cells
+        self.size = size
+        self.max_gated_frames = max_gated_frames
+        self._lock = threading.Lock()
+        self._streams = {}
+
+    @classmethod
+    def from_env(cls):
+        """Build a gate configured from MOTION_GATE_* environment variables"""
+        return cls(
+            threshold=float(os.getenv("MOTION_GATE_THRESHOLD", "15")),
+            max_changed_cells=int(os.getenv("MOTION_GATE_MAX_CHANGED_CELLS", "0")),
+            max_gated_frames=int(os.getenv("MOTION_GATE_MAX_GATED_FRAMES", "48")),
+        )
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def thumbnail(self, frame):
+        """Downsampled grayscale copy of a BGR frame used for differencing"""
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def reuse(self, stream_id, thumbnail):
+        """Return the cached result for the stream if the scene is static.
+
+        Returns None when the frame has to be inferred.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            state = self._streams.setdefault(stream_id, _StreamState())
+            if (
+                state.cached is None
+                or state.gated_in_a_row >= self.max_gated_frames
+                or state.thumbnail.shape != thumbnail.shape
+            ):
+                return None
+            diff = cv2.absdiff(state.thumbnail, thumbnail)
+            if np.count_nonzero(diff >= self.threshold) > self.max_changed_cells:
+                return None
+            state.gated_in_a_row += 1
+            state.gated += 1
+            return state.cached
+
+    def update(self, stream_id, thumbnail, result):
+        """Remember the result of an inferred frame as the new reference"""
+        with self._lock:
+            state = self._streams.setdefault(stream_id, _StreamState())
+            state.thumbnail = thumbnail
+            state.cached = result
+            state.gated_in_a_row = 0
+            state.inferred += 1
+
+    def forget(self, stream_id):
+        with self._lock:
+            self._streams.pop(stream_id, None)
+
+    def status(self):
+        with self._lock:
+            streams = {
+                stream_id: {"gated": state.gated, "inferred": state.inferred}
+                for stream_id, state in self._streams.items()
+            }
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "max_changed_cells": self.max_changed_cells,
+            "gated": sum(s["gated"] for s in streams.values()),
+            "inferred": sum(s["inferred"] for s in streams.values()),
+            "streams": streams,
+        }
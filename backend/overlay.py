@@ -0,0 +1,279 @@
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# mp.solutions.pose.POSE_CONNECTIONS, kept here so drawing does not need
+# MediaPipe's generic drawing utilities
+POSE_CONNECTIONS = np.array(
+    [
+        (0, 1), (0, 4), (1, 2), (2, 3), (3, 7), (4, 5), (5, 6), (6, 8),
+        (9, 10), (11, 12), (11, 13), (11, 23), (12, 14), (12, 24), (13, 15),
+        (14, 16), (15, 17), (15, 19), (15, 21), (16, 18), (16, 20), (16, 22),
+        (17, 19), (18, 20), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+        (27, 29), (27, 31), (28, 30), (28, 32), (29, 31), (30, 32),
+    ]
+)  # fmt: skip
+
+# Landmarks labelled in debug mode
+DEBUG_LANDMARKS = [
+    (23, "L_HIP"),
+    (24, "R_HIP"),
+    (25, "L_KNEE"),
+    (26, "R_KNEE"),
+    (27, "L_ANKLE"),
+    (28, "R_ANKLE"),
+    (11, "L_SHOULDER"),
+    (12, "R_SHOULDER"),
+    (13, "L_ELBOW"),
+    (14, "R_ELBOW"),
+    (15, "L_WRIST"),
+    (16, "R_WRIST"),
+    (0, "NOSE"),
+    (9, "L_EAR"),
+    (10, "R_EAR"),
+]
+
+VISIBILITY_THRESHOLD = 0.5  # Same cut-off as mp_drawing.draw_landmarks
+
+LANDMARK_COLOR = (0, 255, 0)  # Green landmarks
+LANDMARK_RADIUS = 8
+LANDMARK_THICKNESS = 6
+LANDMARK_BORDER_RADIUS = max(LANDMARK_RADIUS + 1, int(LANDMARK_RADIUS * 1.2))
+LANDMARK_BORDER_COLOR = (224, 224, 224)
+CONNECTION_COLOR = (255, 0, 255)  # Magenta connections
+CONNECTION_THICKNESS = 4
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+# Height of the knee angle line, which is redrawn over the cached banner
+ANGLE_ROWS = 38
+
+
+class OverlayRenderer:
+    """Draws the skeleton, debug labels and posture banners onto frames.
+
+    Everything that does not change from frame to frame is rendered once
+    into small sprites (text on its black background box, masked where the
+    box does not cover) and then copied into place, instead of measuring
+    and rasterizing text on every frame. The result is pixel-identical to
+    the previous mp_drawing / putText overlay.
+
+    The skeleton is drawn from a landmark array: one polylines call for all
+    connections, then a pre-rendered stamp for each point.
+    """
+
+    def __init__(self, max_banners=64):
+        self._label_sprites = {}
+        self._angle_sprites = {}
+        self._banners = OrderedDict()
+        self.max_banners = max_banners
+        self._no_pose_banner = None
+
+    def draw_skeleton(self, frame, landmarks):
+        """Draw connections and landmark points from a (33, 4) landmark array"""
+        h, w = frame.shape[:2]
+        xy = landmarks[:, :2]
+        valid = (
+            (landmarks[:, 3] >= VISIBILITY_THRESHOLD)
+            & np.all(xy >= 0, axis=1)
+            & np.all(xy <= 1, axis=1)
+        )
+        px = np.minimum(np.floor(xy * (w, h)).astype(np.int32), (w - 1, h - 1)).astype(
+            np.int32
+        )
+
+        connections = POSE_CONNECTIONS[
+            valid[POSE_CONNECTIONS[:, 0]] & valid[POSE_CONNECTIONS[:, 1]]
+        ]
+        if len(connections):
+            cv2.polylines(
+                frame,
+                list(px[connections]),
+                False,
+                CONNECTION_COLOR,
+                CONNECTION_THICKNESS,
+            )
+        stamp, mask = _LANDMARK_STAMP
+        r = _LANDMARK_EXTENT
+        for x, y in px[valid].tolist():
+            if r <= x < w - r and r <= y < h - r:
+                cv2.copyTo(stamp, mask, frame[y - r : y + r + 1, x - r : x + r + 1])
+            else:
+                _draw_landmark(frame, (x, y))
+
+    def draw_debug_labels(self, frame, landmarks):
+        """Label the key landmarks with their index and name"""
+        h, w = frame.shape[:2]
+        for idx, label in DEBUG_LANDMARKS:
+            if idx < len(landmarks):
+                x = int(landmarks[idx, 0] * w)
+                y = int(landmarks[idx, 1] * h)
+                sprite = self._label_sprite(idx, label)
+                sh, sw = sprite.shape[:2]
+                if (
+                    0 <= x + 10
+                    and x + 10 + sw <= w
+                    and 0 <= y - 15
+                    and y - 15 + sh <= h
+                ):
+                    frame[y - 15 : y - 15 + sh, x + 10 : x + 10 + sw] = sprite
+                else:
+                    # Partly outside the frame; clipped text rasterizes
+                    # differently, so draw it in place
+                    _draw_label(frame, f"{idx}:{label}", x, y)
+
+    def draw_posture_banner(self, frame, angle, message, is_good, landmark_count):
+        """Banner with knee angle, posture message and landmark count"""
+        color = (0, 255, 0) if is_good else (0, 0, 255)
+        key = (message, color, landmark_count)
+        cached = self._banners.get(key)
+        if cached is None:
+            cached = _render_banner(
+                (380, 100),
+                (255, 255, 255),
+                [
+                    (message, (10, 60), 0.8, color, 2),
+                    (f"Landmarks: {landmark_count}", (10, 90), 0.6, (255, 255, 255), 1),
+                ],
+            )
+            self._banners[key] = cached
+            if len(self._banners) > self.max_banners:
+                self._banners.popitem(last=False)
+        else:
+            self._banners.move_to_end(key)
+
+        banner, mask = cached
+        _paste(frame, banner, 19, 19, mask)
+        _paste(frame, self._angle_sprite(int(angle)), 22, 22)
+
+    def draw_no_pose_banner(self, frame):
+        if self._no_pose_banner is None:
+            self._no_pose_banner = _render_banner(
+                (330, 60),
+                (0, 0, 255),
+                [("No pose detected", (10, 30), 0.8, (0, 0, 255), 2)],
+            )
+        banner, mask = self._no_pose_banner
+        _paste(frame, banner, 19, 19, mask)
+
+    def draw_debug_info(self, frame, landmarks, frame_counter):
+        """Knee coordinates and visibility next to the banner"""
+        if len(landmarks) <= 28:
+            return
+        left_knee = landmarks[25]
+        right_knee = landmarks[26]
+        debug_info = [
+            f"L_KNEE: ({left_knee[0]:.2f}, {left_knee[1]:.2f})",
+            f"R_KNEE: ({right_knee[0]:.2f}, {right_knee[1]:.2f})",
+            f"Visibility: L={left_knee[3]:.2f} R={right_knee[3]:.2f}",
+            f"DEBUG MODE: ON | FPS: 24 | Frame: {frame_counter}",
+        ]
+        for i, info in enumerate(debug_info):
+            cv2.putText(frame, info, (420, 50 + i * 25), FONT, 0.5, (255, 255, 255), 1)
+
+    def _label_sprite(self, idx, label):
+        sprite = self._label_sprites.get(idx)
+        if sprite is None:
+            text = f"{idx}:{label}"
+            text_size = cv2.getTextSize(text, FONT, 0.4, 1)[0]
+            sprite = np.zeros((21, text_size[0] + 6, 3), dtype=np.uint8)
+            _draw_label(sprite, text, -10, 15)
+            self._label_sprites[idx] = sprite
+        return sprite
+
+    def _angle_sprite(self, angle):
+        sprite = self._angle_sprites.get(angle)
+        if sprite is None:
+            # Covers the "Knee Angle" line of the banner, inside its border
+            sprite = np.zeros((ANGLE_ROWS, 377, 3), dtype=np.uint8)
+            cv2.putText(
+                sprite,
+                f"Knee Angle: {angle}°",
+                (8, 28),
+                FONT,
+                0.8,
+                (0, 255, 255),  # Cyan for angle
+                2,
+            )
+            self._angle_sprites[angle] = sprite
+        return sprite
+
+
+def _draw_landmark(image, center):
+    """White-bordered landmark point, as mp_drawing.draw_landmarks draws it"""
+    cv2.circle(
+        image, center, LANDMARK_BORDER_RADIUS, LANDMARK_BORDER_COLOR, LANDMARK_THICKNESS
+    )
+    cv2.circle(image, center, LANDMARK_RADIUS, LANDMARK_COLOR, LANDMARK_THICKNESS)
+
+
+def _render_landmark_stamp():
+    """Landmark point and its mask, centered in a square sprite"""
+    r = _LANDMARK_EXTENT
+    stamp = np.zeros((2 * r + 1, 2 * r + 1, 3), dtype=np.uint8)
+    mask = np.zeros((2 * r + 1, 2 * r + 1), dtype=np.uint8)
+    _draw_landmark(stamp, (r, r))
+    cv2.circle(mask, (r, r), LANDMARK_BORDER_RADIUS, 255, LANDMARK_THICKNESS)
+    cv2.circle(mask, (r, r), LANDMARK_RADIUS, 255, LANDMARK_THICKNESS)
+    return stamp, mask
+
+
+def _draw_label(frame, text, x, y):
+    """Debug label with a black background, next to the point (x, y)"""
+    text_size = cv2.getTextSize(text, FONT, 0.4, 1)[0]
+    cv2.rectangle(
+        frame, (x + 10, y - 15), (x + 15 + text_size[0], y + 5), (0, 0, 0), -1
+    )
+    cv2.putText(frame, text, (x + 12, y - 5), FONT, 0.4, (255, 255, 0), 1)
+
+
+def _render_banner(size, border_color, lines):
+    """Black box with a 2px border and text lines, as a sprite and its mask.
+
+    Text positions are relative to the box's top-left corner. The sprite has
+    a one pixel margin for the outer half of the border, so it is pasted one
+    pixel up and left of the box corner, and is widened for text that runs
+    past the box. The mask covers only the pixels the box and text draw.
+    """
+    width, height = size
+    sprite_w, sprite_h = width + 3, height + 3
+    for text, (x, y), scale, color, thickness in lines:
+        (text_w, _), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+        sprite_w = max(sprite_w, x + text_w + thickness + 2)
+        sprite_h = max(sprite_h, y + baseline + thickness + 2)
+
+    banner = np.zeros((sprite_h, sprite_w, 3), dtype=np.uint8)
+    mask = np.zeros((sprite_h, sprite_w), dtype=np.uint8)
+    cv2.rectangle(mask, (1, 1), (width + 1, height + 1), 255, -1)
+    for image, color in ((banner, border_color), (mask, 255)):
+        cv2.rectangle(image, (1, 1), (width + 1, height + 1), color, 2)
+    for text, (x, y), scale, color, thickness in lines:
+        for image, layer_color in ((banner, color), (mask, 255)):
+            cv2.putText(
+                image, text, (x + 1, y + 1), FONT, scale, layer_color, thickness
+            )
+    return banner, mask
+
+
+def _paste(frame, sprite, x, y, mask=None):
+    """Copy a sprite into frame at (x, y), clipped to the frame.
+
+    Without a mask the sprite is opaque; with one (uint8, nonzero where the
+    sprite was drawn) only the masked pixels are copied.
+    """
+    h, w = frame.shape[:2]
+    sh, sw = sprite.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + sw, w), min(y + sh, h)
+    if x0 >= x1 or y0 >= y1:
+        return
+    region = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+    if mask is None:
+        frame[y0:y1, x0:x1] = sprite[region]
+    else:
+        cv2.copyTo(sprite[region], mask[region], frame[y0:y1, x0:x1])
+
+
+# Half size of the landmark stamp: border radius plus half the line width
+_LANDMARK_EXTENT = LANDMARK_BORDER_RADIUS + LANDMARK_THICKNESS // 2 + 1
+_LANDMARK_STAMP = _render_landmark_stamp()
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+
+
+class PoseEngine:
+    """MediaPipe Pose instance that is only built on first use.
+
+    Constructing a Pose graph loads the TFLite model from disk, which is
+    slow for model_complexity=2, so nothing is created until the first call
+    to process() or warm_up().
+    """
+
+    def __init__(self, name, **pose_options):
+        self.name = name
+        self.pose_options = pose_options
+        self._pose = None
+        # Held while building, running and closing the graph, so close()
+        # never tears down a graph in the middle of an inference
+        self._lock = threading.RLock()
+        self.load_seconds = None
+        self.warmed_up = False
+
+    @property
+    def loaded(self):
+        return self._pose is not None
+
+    def get(self):
+        """Return the underlying mp.solutions.pose.Pose, building it if needed"""
+        if self._pose is None:
+            with self._lock:
+                if self._pose is None:
+                    import mediapipe as mp
+
+                    start = time.perf_counter()
+                    self._pose = mp.solutions.pose.Pose(**self.pose_options)
+                    self.load_seconds = time.perf_counter() - start
+                    print(
+                        f"Loaded pose engine '{self.name}' in {self.load_seconds:.2f}s"
+                    )
+        return self._pose
+
+    def close(self):
+        """Release the underlying graph; it is rebuilt on next use"""
+        with self._lock:
+            if self._pose is not None:
+                self._pose.close()
+                self._pose = None
+                self.warmed_up = False
+
+    def process(self, rgb_image):
+        with self._lock:
+            return self.get().process(rgb_image)
+
+    def warm_up(self):
+        """Build the model and run one dummy inference through it"""
+        import numpy as np
+
+        dummy = np.zeros((256, 256, 3), dtype=np.uint8)
+        self.process(dummy)
+        self.warmed_up = True
+
+    def status(self):
+        return {
+            "loaded": self.loaded,
+            "warmed_up": self.warmed_up,
+            "load_seconds": self.load_seconds,
+        }
+
+
+class Readiness:
+    """Tracks whether the pose engines are ready to serve traffic.
+
+    The server is ready once every tracked engine has loaded its model.
+    With a warm-up running, readiness flips only after every tracked engine
+    has also run its dummy inference. Engines that are not tracked still
+    load lazily on first use.
+    """
+
+    def __init__(self, engines):
+        self.engines = engines
+        self.error = None
+        self.warm_up_started_by = None
+        self._thread = None
+        self._warmed_up = False
+
+    @classmethod
+    def from_env(cls, engines):
+        """Track the engines named in POSE_ENGINES (default: all of them)
+
+        Args:
+            engines: dict of engine name -> PoseEngine
+        """
+        names = os.getenv("POSE_ENGINES", ",".join(engines))
+        names = [name.strip() for name in names.split(",") if name.strip()]
+        unknown = [name for name in names if name not in engines]
+        if unknown:
+            raise ValueError(
+                f"Unknown POSE_ENGINES {unknown}, expected some of {list(engines)}"
+            )
+        return cls([engines[name] for name in names])
+
+    @property
+    def ready(self):
+        if self._thread is not None and not self._warmed_up:
+            return False
+        return all(engine.loaded for engine in self.engines)
+
+    def start_warm_up(self, started_by="startup"):
+        """Warm up the tracked engines on a background thread"""
+        if self._thread is not None:
+            return
+        self.warm_up_started_by = started_by
+        self._thread = threading.Thread(
+            target=self._warm_up, name="pose-warm-up", daemon=True
+        )
+        self._thread.start()
+
+    def _warm_up(self):
+        try:
+            for engine in self.engines:
+                engine.warm_up()
+            self._warmed_up = True
+            print("Pose engines warmed up - ready for traffic")
+        except Exception as e:
+            self.error = str(e)
+            print(f"Error warming up pose engines: {e}")
+            # Allow the next readiness probe to try again
+            self._thread = None
+
+    def status(self):
+        if self._warmed_up:
+            warm_up = "done"
+        elif self._thread is not None:
+            warm_up = "running"
+        elif self.error:
+            warm_up = "failed"
+        else:
+            warm_up = "not_started"
+        result = {
+            "ready": self.ready,
+            "warm_up": warm_up,
+            "warm_up_started_by": self.warm_up_started_by,
+            "engines": {engine.name: engine.status() for engine in self.engines},
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
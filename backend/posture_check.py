@@ -1,4 +1,8 @@
 import numpy as np
+from posture_rules import PostureRuleEngine, lifting_rules
+
+# Rule engines holding only the lifting check, keyed by knee threshold
+_lifting_engines = {}
 
 def calculate_angle(a, b, c):
     """Calculate angle at point b given three 2D points a, b, c"""
@@ -13,9 +17,19 @@ def calculate_angle(a, b, c):
     angle = np.arccos(np.clip(cosine_angle, -1.0, 1.0))
     return np.degrees(angle)
 
+def landmarks_to_array(pose_landmarks, dtype=np.float32):
+    """Convert MediaPipe pose landmarks to a (33, 4) array of x, y, z, visibility"""
+    return np.array(
+        [[lm.x, lm.y, lm.z, lm.visibility] for lm in pose_landmarks.landmark],
+        dtype=dtype,
+    )
+
 def check_lifting_posture(pose_landmarks, threshold=150):
     """
     Check if the lifting posture is good based on knee bend and body position.
+
+    This is the "lifting" check of posture_rules.PostureRuleEngine; use the
+    engine directly to evaluate it together with the other posture checks.
     
     Args:
         pose_landmarks: MediaPipe pose landmarks object
@@ -26,84 +40,17 @@ def check_lifting_posture(pose_landmarks, threshold=150):
                Returns (None, None, error_message) if detection fails
     """
     try:
-        # Extract landmarks
-        landmarks = pose_landmarks.landmark
-        
-        def get_point(landmark_id):
-            lm = landmarks[landmark_id]
-            return [lm.x, lm.y]
-        
-        # Get points for both legs using MediaPipe landmark IDs
-        left_hip = get_point(23)    # LEFT_HIP
-        left_knee = get_point(25)   # LEFT_KNEE
-        left_ankle = get_point(27)  # LEFT_ANKLE
-        
-        right_hip = get_point(24)   # RIGHT_HIP
-        right_knee = get_point(26)  # RIGHT_KNEE
-        right_ankle = get_point(28) # RIGHT_ANKLE
-        
-        # Get upper body points for bend detection
-        left_shoulder = get_point(11)   # LEFT_SHOULDER
-        right_shoulder = get_point(12)  # RIGHT_SHOULDER
-        nose = get_point(0)             # NOSE
-        
-        # Calculate knee angles for both legs
-        left_knee_angle = calculate_angle(left_hip, left_knee, left_ankle)
-        right_knee_angle = calculate_angle(right_hip, right_knee, right_ankle)
-        avg_knee_angle = (left_knee_angle + right_knee_angle) / 2
-        
-        # Calculate if person is bending forward
-        avg_shoulder_y = (left_shoulder[1] + right_shoulder[1]) / 2
-        avg_hip_y = (left_hip[1] + right_hip[1]) / 2
-        nose_y = nose[1]
-        
-        # Check forward bend indicators (loosened criteria)
-        shoulder_hip_distance = avg_hip_y - avg_shoulder_y
-        nose_shoulder_distance = nose_y - avg_shoulder_y
-        
-        # Reduced threshold from 0.5 to 0.3 - more sensitive to forward bend
-        is_bending_forward = nose_shoulder_distance > shoulder_hip_distance * 0.3
-        
-        # Alternative check: if nose is below shoulder level
-        is_head_low = nose_y > avg_shoulder_y + 0.05  # Small margin for normal standing
-        
-        # Check if torso is tilted (shoulder to hip angle)
-        torso_vertical_offset = abs((left_shoulder[0] + right_shoulder[0]) / 2 - 
-                                   (left_hip[0] + right_hip[0]) / 2)
-        is_torso_tilted = torso_vertical_offset > 0.08  # Reduced from implicit check
-        
-        # Combine all bending indicators - person is likely lifting if ANY are true
-        is_attempting_lift = is_bending_forward or is_head_low or is_torso_tilted
-        
-        # Determine posture status based on context
-        if avg_knee_angle > 165:  # Reduced from 170 - slightly bent knees still count as "straight"
-            if is_attempting_lift:
-                # Person is bending to pick something with straight legs - BAD
-                is_good_posture = False
-                message = "Bad posture - Bend your knees when lifting!"
-            else:
-                # Person is just standing upright - GOOD
-                is_good_posture = True
-                message = "Good posture - Standing upright"
-        elif avg_knee_angle < threshold:
-            # Knees are bent properly
-            is_good_posture = True
-            if is_attempting_lift:
-                # Person is squatting/lifting properly - GOOD
-                message = "Good posture - Proper squatting technique"
-            else:
-                # Just standing with bent knees - GOOD
-                message = "Good posture - Knees bent"
-        else:
-            # Knees partially bent (between threshold and 165)
-            if is_attempting_lift:
-                is_good_posture = False
-                message = "Bad posture - Bend knees more when lifting"
-            else:
-                is_good_posture = True
-                message = "Good posture"
-        
-        return is_good_posture, avg_knee_angle, message
+        # Evaluate the lifting decision list on the shared feature table
+        engine = _lifting_engines.get(threshold)
+        if engine is None:
+            engine = PostureRuleEngine({"lifting": {"rules": lifting_rules(threshold)}})
+            _lifting_engines[threshold] = engine
+
+        points = landmarks_to_array(pose_landmarks, dtype=np.float64)
+        result = engine.evaluate_frame(points)
+        lifting = result["checks"]["lifting"]
+
+        return lifting["isGood"], result["features"]["avg_knee_angle"], lifting["message"]
         
     except Exception as e:
         return None, None, f"Error detecting posture: {str(e)}"
@@ -0,0 +1,73 @@
+import struct
+
+import numpy as np
+
+# Compact binary form of a posture result, served instead of JSON when the
+# client sends "Accept: application/vnd.posturecheck.record".
+#
+# Layout (little endian, RECORD_SIZE = 544 bytes):
+#   4s   magic b"PSTR"
+#   B    version
+#   B    flags (FLAG_*)
+#   H    reserved, always 0
+#   I    sequence number (0 for one-off static checks)
+#   f    knee angle in degrees (NaN when there is no verdict)
+#   33 x 4 float32   landmark x, y, z, visibility (zeros when not detected)
+
+MIME_TYPE = "application/vnd.posturecheck.record"
+MAGIC = b"PSTR"
+VERSION = 1
+NUM_LANDMARKS = 33
+
+FLAG_LANDMARKS = 0x01  # Landmarks were detected
+FLAG_VERDICT = 0x02  # A posture verdict is present
+FLAG_GOOD = 0x04  # The verdict is good posture
+
+HEADER = struct.Struct("<4sBBHIf")
+LANDMARKS_DTYPE = np.dtype("<f4")
+RECORD_SIZE = HEADER.size + NUM_LANDMARKS * 4 * LANDMARKS_DTYPE.itemsize
+
+_NO_LANDMARKS = bytes(NUM_LANDMARKS * 4 * LANDMARKS_DTYPE.itemsize)
+
+
+def encode_record(seq, landmarks=None, is_good=None, angle=None):
+    """Pack one posture result into a fixed-size binary record"""
+    flags = 0
+    if landmarks is not None:
+        flags |= FLAG_LANDMARKS
+        landmark_bytes = np.asarray(landmarks, dtype=LANDMARKS_DTYPE).tobytes()
+    else:
+        landmark_bytes = _NO_LANDMARKS
+    if is_good is not None:
+        flags |= FLAG_VERDICT
+        if is_good:
+            flags |= FLAG_GOOD
+    angle = float("nan") if angle is None else float(angle)
+    header = HEADER.pack(MAGIC, VERSION, flags, 0, seq & 0xFFFFFFFF, angle)
+    return header + landmark_bytes
+
+
+def decode_record(buffer):
+    """Unpack a binary record produced by encode_record"""
+    if len(buffer) != RECORD_SIZE:
+        raise ValueError(f"Expected {RECORD_SIZE} bytes, got {len(buffer)}")
+    magic, version, flags, _, seq, angle = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a posture record")
+    landmarks = None
+    if flags & FLAG_LANDMARKS:
+        landmarks = np.frombuffer(
+            buffer, dtype=LANDMARKS_DTYPE, offset=HEADER.size
+        ).reshape(NUM_LANDMARKS, 4)
+    has_verdict = bool(flags & FLAG_VERDICT)
+    return {
+        "seq": seq,
+        "landmarks": landmarks,
+        "isGood": bool(flags & FLAG_GOOD) if has_verdict else None,
+        "angle": angle if has_verdict else None,
+    }
+
+
+def wants_binary(accept_mimetypes):
+    """True if the request's Accept header prefers the binary record over JSON"""
+    return accept_mimetypes.best_match(["application/json", MIME_TYPE]) == MIME_TYPE
@@ -0,0 +1,329 @@
+import numpy as np
+
+# MediaPipe pose landmark ids used by the feature table
+NOSE = 0
+LEFT_EAR, RIGHT_EAR = 7, 8
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+_OPS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+}
+
+
+def joint_angle(a, b, c):
+    """Angle in degrees at b for arrays of 2D points with shape (..., 2)"""
+    ba = a - b
+    bc = c - b
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cosine_angle = np.sum(ba * bc, axis=-1) / (
+            np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+        )
+    return np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
+
+
+def compute_features(points):
+    """Build the joint-angle feature table for one or many frames.
+
+    Args:
+        points: array of shape (..., 33, 4) with x, y, z, visibility per
+                landmark, e.g. from posture_check.landmarks_to_array, or a
+                stack of them for batch evaluation
+
+    Returns:
+        dict of feature name -> array with the leading (...) shape
+    """
+    points = np.asarray(points, dtype=np.float64)
+    xy = points[..., :2]
+    z = points[..., 2]
+
+    def mid(a, b):
+        return (xy[..., a, :] + xy[..., b, :]) / 2
+
+    f = {}
+
+    # Joint angles (2D, image plane)
+    f["left_knee_angle"] = joint_angle(
+        xy[..., LEFT_HIP, :], xy[..., LEFT_KNEE, :], xy[..., LEFT_ANKLE, :]
+    )
+    f["right_knee_angle"] = joint_angle(
+        xy[..., RIGHT_HIP, :], xy[..., RIGHT_KNEE, :], xy[..., RIGHT_ANKLE, :]
+    )
+    f["avg_knee_angle"] = (f["left_knee_angle"] + f["right_knee_angle"]) / 2
+    f["left_hip_angle"] = joint_angle(
+        xy[..., LEFT_SHOULDER, :], xy[..., LEFT_HIP, :], xy[..., LEFT_KNEE, :]
+    )
+    f["right_hip_angle"] = joint_angle(
+        xy[..., RIGHT_SHOULDER, :], xy[..., RIGHT_HIP, :], xy[..., RIGHT_KNEE, :]
+    )
+    f["left_elbow_angle"] = joint_angle(
+        xy[..., LEFT_SHOULDER, :], xy[..., LEFT_ELBOW, :], xy[..., LEFT_WRIST, :]
+    )
+    f["right_elbow_angle"] = joint_angle(
+        xy[..., RIGHT_SHOULDER, :], xy[..., RIGHT_ELBOW, :], xy[..., RIGHT_WRIST, :]
+    )
+    f["left_shoulder_angle"] = joint_angle(
+        xy[..., LEFT_HIP, :], xy[..., LEFT_SHOULDER, :], xy[..., LEFT_ELBOW, :]
+    )
+    f["right_shoulder_angle"] = joint_angle(
+        xy[..., RIGHT_HIP, :], xy[..., RIGHT_SHOULDER, :], xy[..., RIGHT_ELBOW, :]
+    )
+
+    # Midpoints
+    shoulder_mid = mid(LEFT_SHOULDER, RIGHT_SHOULDER)
+    hip_mid = mid(LEFT_HIP, RIGHT_HIP)
+    ear_mid = mid(LEFT_EAR, RIGHT_EAR)
+    nose = xy[..., NOSE, :]
+    f["shoulder_mid_x"], f["shoulder_mid_y"] = (
+        shoulder_mid[..., 0],
+        shoulder_mid[..., 1],
+    )
+    f["hip_mid_x"], f["hip_mid_y"] = hip_mid[..., 0], hip_mid[..., 1]
+
+    # Torso tilt from vertical, in degrees (0 = upright)
+    torso = shoulder_mid - hip_mid
+    f["torso_tilt"] = np.degrees(np.arctan2(np.abs(torso[..., 0]), -torso[..., 1]))
+
+    # Head/neck line against the torso line; drops below 180 as the upper
+    # back rounds and the head falls forward
+    f["neck_angle"] = joint_angle(ear_mid, shoulder_mid, hip_mid)
+
+    # Trunk twist: angle between the shoulder line and hip line seen from
+    # above (x-z plane)
+    shoulder_heading = np.arctan2(
+        z[..., RIGHT_SHOULDER] - z[..., LEFT_SHOULDER],
+        xy[..., RIGHT_SHOULDER, 0] - xy[..., LEFT_SHOULDER, 0],
+    )
+    hip_heading = np.arctan2(
+        z[..., RIGHT_HIP] - z[..., LEFT_HIP],
+        xy[..., RIGHT_HIP, 0] - xy[..., LEFT_HIP, 0],
+    )
+    twist = np.degrees(shoulder_heading - hip_heading)
+    f["trunk_twist"] = np.abs((twist + 180) % 360 - 180)
+
+    # Height of the highest wrist above the nose (image y grows downwards)
+    f["overhead_reach"] = nose[..., 1] - np.minimum(
+        xy[..., LEFT_WRIST, 1], xy[..., RIGHT_WRIST, 1]
+    )
+
+    # Forward bend indicators used by the lifting check
+    f["shoulder_hip_distance"] = hip_mid[..., 1] - shoulder_mid[..., 1]
+    f["nose_shoulder_distance"] = nose[..., 1] - shoulder_mid[..., 1]
+    f["torso_vertical_offset"] = np.abs(shoulder_mid[..., 0] - hip_mid[..., 0])
+    f["is_bending_forward"] = (
+        f["nose_shoulder_distance"] > f["shoulder_hip_distance"] * 0.3
+    )
+    f["is_head_low"] = nose[..., 1] > shoulder_mid[..., 1] + 0.05
+    f["is_torso_tilted"] = f["torso_vertical_offset"] > 0.08
+    f["is_attempting_lift"] = (
+        f["is_bending_forward"] | f["is_head_low"] | f["is_torso_tilted"]
+    )
+
+    # Per-landmark visibility, used to gate checks
+    f["visibility"] = points[..., 3]
+
+    return f
+
+
+def lifting_rules(threshold=150):
+    """Decision list reproducing the original knee-bend lifting check.
+
+    threshold is the knee angle (degrees) below which knees count as bent.
+    """
+    return [
+        {
+            "name": "straight_leg_lift",
+            "when": [("avg_knee_angle", ">", 165), ("is_attempting_lift", "==", True)],
+            "good": False,
+            "message": "Bad posture - Bend your knees when lifting!",
+        },
+        {
+            "name": "standing_upright",
+            "when": [("avg_knee_angle", ">", 165)],
+            "good": True,
+            "message": "Good posture - Standing upright",
+        },
+        {
+            "name": "proper_squat",
+            "when": [
+                ("avg_knee_angle", "<", threshold),
+                ("is_attempting_lift", "==", True),
+            ],
+            "good": True,
+            "message": "Good posture - Proper squatting technique",
+        },
+        {
+            "name": "knees_bent",
+            "when": [("avg_knee_angle", "<", threshold)],
+            "good": True,
+            "message": "Good posture - Knees bent",
+        },
+        {
+            "name": "partial_knee_lift",
+            "when": [("is_attempting_lift", "==", True)],
+            "good": False,
+            "message": "Bad posture - Bend knees more when lifting",
+        },
+        {
+            "name": "good",
+            "when": [],
+            "good": True,
+            "message": "Good posture",
+        },
+    ]
+
+
+def default_checks(knee_threshold=150):
+    """Checks evaluated on every frame.
+
+    Each check is a decision list: rules are tried in order and the first
+    one whose conditions all hold gives the verdict. A check with
+    "landmarks" is skipped (reported good, rule "not_visible") unless all
+    of those landmarks have at least "min_visibility".
+    """
+    return {
+        "lifting": {"rules": lifting_rules(knee_threshold)},
+        "back_rounding": {
+            "landmarks": [
+                LEFT_EAR,
+                RIGHT_EAR,
+                LEFT_SHOULDER,
+                RIGHT_SHOULDER,
+                LEFT_HIP,
+                RIGHT_HIP,
+            ],
+            "min_visibility": 0.5,
+            "rules": [
+                {
+                    "name": "rounded_back_lift",
+                    "when": [
+                        ("neck_angle", "<", 140),
+                        ("is_attempting_lift", "==", True),
+                    ],
+                    "good": False,
+                    "message": "Bad posture - Keep your back straight",
+                },
+                {"name": "good", "when": [], "good": True, "message": "Back straight"},
+            ],
+        },
+        "trunk_twist": {
+            "landmarks": [LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP],
+            "min_visibility": 0.5,
+            "rules": [
+                {
+                    "name": "twisting",
+                    "when": [("trunk_twist", ">", 30)],
+                    "good": False,
+                    "message": "Bad posture - Avoid twisting your trunk",
+                },
+                {"name": "good", "when": [], "good": True, "message": "No trunk twist"},
+            ],
+        },
+        "overhead_reach": {
+            "landmarks": [NOSE, LEFT_WRIST, RIGHT_WRIST],
+            "min_visibility": 0.5,
+            "rules": [
+                {
+                    "name": "reaching_overhead",
+                    "when": [("overhead_reach", ">", 0.05)],
+                    "good": False,
+                    "message": "Caution - Reaching overhead",
+                },
+                {
+                    "name": "good",
+                    "when": [],
+                    "good": True,
+                    "message": "No overhead reach",
+                },
+            ],
+        },
+    }
+
+
+class PostureRuleEngine:
+    """Evaluates many posture checks against one shared feature table.
+
+    Features are computed once per frame (or once per batch of frames), so
+    adding checks only adds a few comparisons, not more geometry.
+    """
+
+    def __init__(self, checks=None):
+        self.checks = default_checks() if checks is None else checks
+
+    def evaluate(self, points):
+        """Evaluate all checks for (..., 33, 4) landmark arrays.
+
+        Returns:
+            tuple: (features, results) where results maps check name to
+                   {"good": bool array, "rule": str array, "message": str array}
+        """
+        features = compute_features(points)
+        shape = features["avg_knee_angle"].shape
+        results = {}
+        for check_name, check in self.checks.items():
+            rules = check["rules"]
+            masks = []
+            for rule in rules:
+                mask = np.ones(shape, dtype=bool)
+                for feature, op, value in rule["when"]:
+                    mask &= _OPS[op](features[feature], value)
+                masks.append(mask)
+
+            # Checks on landmarks that are not visible fall through to an
+            # extra "not_visible" rule placed first
+            names = [rule["name"] for rule in rules]
+            goods = [rule["good"] for rule in rules]
+            messages = [rule["message"] for rule in rules]
+            if "landmarks" in check:
+                visible = np.all(
+                    features["visibility"][..., check["landmarks"]]
+                    >= check.get("min_visibility", 0.5),
+                    axis=-1,
+                )
+                masks.insert(0, ~visible)
+                names.insert(0, "not_visible")
+                goods.insert(0, True)
+                messages.insert(0, "Landmarks not visible")
+
+            # Index of the first matching rule; a frame no rule matches
+            # counts as good
+            stacked = np.stack(masks + [np.ones(shape, dtype=bool)], axis=-1)
+            first = np.argmax(stacked, axis=-1)
+            results[check_name] = {
+                "good": np.array(goods + [True])[first],
+                "rule": np.array(names + ["none"])[first],
+                "message": np.array(messages + ["Good posture"])[first],
+            }
+        return features, results
+
+    def evaluate_frame(self, points):
+        """Evaluate all checks for a single (33, 4) landmark array.
+
+        Returns:
+            dict: {"features": {name: float or bool}, "checks": {name:
+                  {"isGood": bool, "rule": str, "message": str}}}
+        """
+        features, results = self.evaluate(points)
+        return {
+            "features": {
+                name: value.item()
+                for name, value in features.items()
+                if name != "visibility"
+            },
+            "checks": {
+                name: {
+                    "isGood": bool(result["good"]),
+                    "rule": str(result["rule"]),
+                    "message": str(result["message"]),
+                }
+                for name, result in results.items()
+            },
+        }
@@ -0,0 +1,129 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from frame_capture import read_capture
+
+
+def verdicts(rule_engine, landmarks):
+    """Rule fired per posture check, or None when no pose was detected"""
+    if landmarks is None:
+        return None
+    checks = rule_engine.evaluate_frame(landmarks)["checks"]
+    return {name: check["rule"] for name, check in checks.items()}
+
+
+def replay(path, speed=1.0, stream_id="replay", compare=False):
+    """Feed a capture file through process_and_store_frame.
+
+    Args:
+        path: capture file written by frame_capture.FrameCapture
+        speed: playback speed relative to the recorded arrival times;
+               0 replays as fast as possible
+        stream_id: stream the frames are submitted as
+        compare: compare the posture verdicts of the replayed landmarks with
+                 the recorded ones
+
+    Returns:
+        dict: replay statistics
+    """
+    # Imported here so that building the app (and its pose engines) only
+    # happens when a replay actually runs
+    import backend_server
+
+    stats = {"frames": 0, "processed": 0, "compared": 0, "mismatches": 0}
+    mismatches_by_check = {}
+    latencies = []
+    first_timestamp = None
+    start = time.perf_counter()
+
+    for record in read_capture(path):
+        if first_timestamp is None:
+            first_timestamp = record.timestamp
+        if speed > 0:
+            due = start + (record.timestamp - first_timestamp) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        frame = cv2.imdecode(np.frombuffer(record.jpeg, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            print(f"Frame {stats['frames']}: could not decode, skipping")
+            continue
+
+        # Reproduce the recorded skip pattern: the server only processes
+        # frames for which the incremented counter is odd
+        backend_server.frame_skip_counter = 0 if record.processed else 1
+
+        t0 = time.perf_counter()
+        processed, landmarks = backend_server.process_and_store_frame(frame, stream_id)
+        latencies.append(time.perf_counter() - t0)
+
+        stats["frames"] += 1
+        if processed:
+            stats["processed"] += 1
+
+        if compare and processed and record.processed:
+            stats["compared"] += 1
+            recorded = verdicts(backend_server.rule_engine, record.landmarks)
+            replayed = verdicts(backend_server.rule_engine, landmarks)
+            if recorded != replayed:
+                stats["mismatches"] += 1
+                for name in recorded or replayed:
+                    before = recorded and recorded[name]
+                    after = replayed and replayed[name]
+                    if before != after:
+                        mismatches_by_check[name] = mismatches_by_check.get(name, 0) + 1
+                if stats["mismatches"] <= 20:
+                    print(
+                        f"Frame {stats['frames'] - 1} ({record.timestamp:.3f}): "
+                        f"recorded {recorded} replayed {replayed}"
+                    )
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 3)
+    stats["fps"] = round(stats["frames"] / elapsed, 2) if elapsed > 0 else None
+    if latencies:
+        ms = np.array(latencies) * 1000
+        stats["latency_ms"] = {
+            "p50": round(float(np.percentile(ms, 50)), 2),
+            "p95": round(float(np.percentile(ms, 95)), 2),
+            "max": round(float(ms.max()), 2),
+        }
+    if compare:
+        stats["mismatches_by_check"] = mismatches_by_check
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay a frame capture file through the posture pipeline"
+    )
+    parser.add_argument("capture", type=str)
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Playback speed relative to the original pace (default: 1)",
+    )
+    parser.add_argument(
+        "--fast", action="store_true", help="Replay as fast as possible"
+    )
+    parser.add_argument("--stream-id", type=str, default="replay")
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Compare replayed posture verdicts with the recorded ones",
+    )
+    args = parser.parse_args()
+
+    print(
+        replay(
+            args.capture,
+            speed=0 if args.fast else args.speed,
+            stream_id=args.stream_id,
+            compare=args.compare,
+        )
+    )
@@ -0,0 +1,102 @@
+import os
+import sys
+import threading
+import time
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler across all threads.
+
+    While a profile runs, the thread calling profile() periodically snapshots
+    the stack of every other thread with sys._current_frames() and counts
+    identical stacks. Code marks what a thread is working on with tag();
+    tags are prepended to the sampled stacks so the profile can be split by
+    stream and pipeline stage.
+
+    When no profile is running tag() returns after a single attribute check,
+    so the tagging calls can stay in production code.
+    """
+
+    def __init__(self):
+        self.active = False
+        self._tags = {}
+        self._run_lock = threading.Lock()
+
+    def tag(self, stage, stream=None):
+        """Label the calling thread's work until the next tag() or clear()"""
+        if not self.active:
+            return
+        self._tags[threading.get_ident()] = (stage, stream)
+
+    def clear(self):
+        """Remove the calling thread's label"""
+        if not self.active:
+            return
+        self._tags.pop(threading.get_ident(), None)
+
+    def profile(self, seconds, interval=0.005):
+        """Sample all threads for the given duration.
+
+        Returns:
+            dict: collapsed stack string -> number of samples
+        """
+        if not self._run_lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        counts = {}
+        own_ident = threading.get_ident()
+        try:
+            self._tags.clear()
+            self.active = True
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_ident:
+                        continue
+                    stack = _collapse(frame)
+                    tag = self._tags.get(ident)
+                    if tag is not None:
+                        stage, stream = tag
+                        stack = f"stage={_label(stage)};{stack}"
+                        if stream is not None:
+                            stack = f"stream={_label(stream)};{stack}"
+                    stack = f"{_label(names.get(ident, ident))};{stack}"
+                    counts[stack] = counts.get(stack, 0) + 1
+                time.sleep(interval)
+        finally:
+            self.active = False
+            self._tags.clear()
+            self._run_lock.release()
+        return counts
+
+
+def _collapse(frame):
+    """Root-to-leaf 'function (file:line)' frames joined with ';'"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        frames.append(label.replace(";", ":"))
+        frame = frame.f_back
+    frames.reverse()
+    return ";".join(frames)
+
+
+def _label(value):
+    """Client-supplied or free-form text as one collapsed-stack frame"""
+    return "_".join(str(value).replace(";", ":").split()) or "_"
+
+
+def to_collapsed_text(counts):
+    """Render counts in the collapsed-stack format used by flamegraph.pl,
+    speedscope and similar tools: one 'frame;frame;frame count' per line
+    """
+    lines = [
+        f"{stack} {count}"
+        for stack, count in sorted(counts.items(), key=lambda item: -item[1])
+    ]
+    return "\n".join(lines) + "\n"
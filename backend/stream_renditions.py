@@ -0,0 +1,184 @@
+import threading
+import time
+
+import cv2
+
+# Rendition tiers for /api/video-stream, best first. jpeg_quality None means
+# the quality the load governor picked for the stream; lower tiers are
+# additionally capped by it.
+RENDITIONS = [
+    {"name": "full", "scale": 1.0, "jpeg_quality": None, "fps": 24},
+    {"name": "medium", "scale": 0.5, "jpeg_quality": 65, "fps": 12},
+    {"name": "low", "scale": 0.25, "jpeg_quality": 50, "fps": 5},
+]
+
+RENDITION_INDEX = {rendition["name"]: i for i, rendition in enumerate(RENDITIONS)}
+
+
+class RenditionCache:
+    """Encodes each frame at most once per rendition tier.
+
+    Viewers on the same tier share the JPEG bytes of the latest frame
+    version, so encode cost grows with the number of tiers in use rather
+    than with the number of viewers.
+    """
+
+    def __init__(self):
+        self._locks = {rendition["name"]: threading.Lock() for rendition in RENDITIONS}
+        self._encoded = {}
+        self._viewers = set()
+        self._viewers_lock = threading.Lock()
+        self.encodes = {rendition["name"]: 0 for rendition in RENDITIONS}
+
+    def get(self, rendition, version, frame, stream_quality):
+        """Return JPEG bytes of frame (with the given version) for a rendition"""
+        name = rendition["name"]
+        cached = self._encoded.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._locks[name]:
+            # Another viewer may have encoded it while we waited
+            cached = self._encoded.get(name)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            if rendition["scale"] != 1.0:
+                frame = cv2.resize(
+                    frame,
+                    None,
+                    fx=rendition["scale"],
+                    fy=rendition["scale"],
+                    interpolation=cv2.INTER_AREA,
+                )
+            quality = stream_quality
+            if rendition["jpeg_quality"] is not None:
+                quality = min(quality, rendition["jpeg_quality"])
+            ret, buffer = cv2.imencode(
+                ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality]
+            )
+            if not ret:
+                raise RuntimeError("Failed to encode frame")
+            data = buffer.tobytes()
+            self._encoded[name] = (version, data)
+            self.encodes[name] += 1
+            return data
+
+    def add_viewer(self, pacer):
+        with self._viewers_lock:
+            self._viewers.add(pacer)
+
+    def remove_viewer(self, pacer):
+        with self._viewers_lock:
+            self._viewers.discard(pacer)
+
+    def status(self):
+        with self._viewers_lock:
+            pacers = list(self._viewers)
+        viewers = {rendition["name"]: 0 for rendition in RENDITIONS}
+        for pacer in pacers:
+            viewers[pacer.rendition["name"]] += 1
+        return {"viewers": viewers, "encodes": dict(self.encodes)}
+
+
+class ViewerPacer:
+    """Chooses the rendition tier and send times for one stream viewer.
+
+    A viewer can declare a tier or a maximum frame rate; otherwise the tier
+    adapts to how long each frame takes to send. Writes that block for a
+    large part of the frame interval mean the viewer cannot keep up and it
+    drops one tier; consistently quick writes let it climb back once
+    upgrade_backoff has passed since the last drop. Frames that arrive
+    while a viewer is busy are never queued for it - it simply gets the
+    newest frame on its next tick.
+    """
+
+    def __init__(
+        self,
+        rendition_index=None,
+        slow_ratio=0.75,
+        fast_ratio=0.15,
+        switch_cooldown=3.0,
+        upgrade_backoff=20.0,
+        keepalive=1.0,
+        alpha=0.3,
+    ):
+        self.adaptive = rendition_index is None
+        self.index = 0 if rendition_index is None else rendition_index
+        self.slow_ratio = slow_ratio
+        self.fast_ratio = fast_ratio
+        self.switch_cooldown = switch_cooldown
+        self.upgrade_backoff = upgrade_backoff
+        self.keepalive = keepalive
+        self.alpha = alpha
+        self.send_ewma = None
+        self.last_switch = time.monotonic()
+        self.upgrade_after = self.last_switch
+        self.last_version = None
+        self.last_sent = 0.0
+        self.next_due = time.monotonic()
+
+    @classmethod
+    def from_args(cls, args):
+        """Build a pacer from the ?tier= or ?fps= query parameters"""
+        tier = args.get("tier")
+        if tier in RENDITION_INDEX:
+            return cls(RENDITION_INDEX[tier])
+        fps = args.get("fps", type=float)
+        if fps:
+            # Best tier whose frame rate the viewer asked to keep up with
+            for i, rendition in enumerate(RENDITIONS):
+                if rendition["fps"] <= fps:
+                    return cls(i)
+            return cls(len(RENDITIONS) - 1)
+        return cls()
+
+    @property
+    def rendition(self):
+        return RENDITIONS[self.index]
+
+    @property
+    def interval(self):
+        return 1.0 / self.rendition["fps"]
+
+    def should_send(self, version):
+        """True if the frame version is new, or a keepalive is due"""
+        if version != self.last_version:
+            return True
+        return time.monotonic() - self.last_sent >= self.keepalive
+
+    def sent(self, version, seconds):
+        """Record that a frame took seconds to write to the viewer"""
+        now = time.monotonic()
+        self.last_version = version
+        self.last_sent = now
+        if self.send_ewma is None:
+            self.send_ewma = seconds
+        else:
+            self.send_ewma += self.alpha * (seconds - self.send_ewma)
+
+        if self.adaptive and now - self.last_switch >= self.switch_cooldown:
+            if (
+                self.send_ewma > self.slow_ratio * self.interval
+                and self.index < len(RENDITIONS) - 1
+            ):
+                self.index += 1
+                self.upgrade_after = now + self.upgrade_backoff
+                self._switched(now)
+            elif (
+                self.send_ewma < self.fast_ratio * self.interval
+                and self.index > 0
+                and now >= self.upgrade_after
+            ):
+                self.index -= 1
+                self._switched(now)
+
+    def _switched(self, now):
+        self.last_switch = now
+        self.send_ewma = None
+
+    def wait(self):
+        """Sleep until this viewer's next frame is due"""
+        self.next_due = max(self.next_due + self.interval, time.monotonic())
+        delay = self.next_due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
@@ -24,6 +24,7 @@ export default function VideoStream({
     const frameCountRef = useRef<number>(0)
     const lastVideoTimeRef = useRef<number>(0)
     const lastFrameHashRef = useRef<string>('')
+    const lastItemAnalysisRef = useRef<number | null>(null)
 
     const [error, setError] = useState<string | null>(null)
     const [badPostureStart, setBadPostureStart] = useState<Date | null>(null)
@@ -246,28 +247,6 @@ export default function VideoStream({
         }
     }, [])
 
-    const analyzeImage = useCallback(async (imageBlob: Blob) => {
-        try {
-            const formData = new FormData()
-            formData.append('image', imageBlob)
-
-            const response = await fetch('http://localhost:5001/api/image-analysis', {
-                method: 'POST',
-                body: formData
-            })
-
-            if (!response.ok) {
-                throw new Error('Failed to analyze image')
-            }
-
-            const result = await response.json()
-            return result
-        } catch (error) {
-            console.error('Image analysis error:', error)
-            return null
-        }
-    }, [])
-
     // Function to fetch and display processed video frames
     const fetchProcessedFrame = useCallback(async () => {
         if (!processedCanvasRef.current || !showProcessedVideo) return
@@ -438,16 +417,18 @@ export default function VideoStream({
                 }
             }
 
-            // Analyze image for heavy items every 240 frames (~10 seconds at 24fps)
-            if (currentFrame % 240 === 0) {
-                const imageResult = await analyzeImage(frameBlob)
-                console.log('Image analysis result:', imageResult)
-                setLastImageAnalysis(new Date())
+            // Items are analyzed on the server when a lift is detected; pick up
+            // new results from the posture data
+            const itemAnalysis = postureResult?.itemAnalysis
+            if (itemAnalysis && itemAnalysis.analyzed_at !== lastItemAnalysisRef.current) {
+                lastItemAnalysisRef.current = itemAnalysis.analyzed_at
+                console.log('Image analysis result:', itemAnalysis)
+                setLastImageAnalysis(new Date(itemAnalysis.analyzed_at * 1000))
             }
         }, 42) // Check for new frames at ~24fps (1000ms / 24fps ≈ 42ms)
 
         return () => clearInterval(interval)
-    }, [isRecording, captureFrame, sendFrameToBackend, fetchCurrentPosture, analyzeImage, badPostureStart, startIncidentRecording, stopIncidentRecording])
+    }, [isRecording, captureFrame, sendFrameToBackend, fetchCurrentPosture, badPostureStart, startIncidentRecording, stopIncidentRecording])
 
     // Start processed video stream when recording starts
     useEffect(() => {